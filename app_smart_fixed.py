@@ -1,84 +1,372 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, abort, request
+from flask.json.provider import JSONProvider
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
-import json
+from flask_compress import Compress
+import orjson
+import brotli
+import rcssmin
+import rjsmin
 import os
+import re
 import traceback
 from dotenv import load_dotenv
 import logging
 from functools import lru_cache
+from collections import OrderedDict
+import threading
+import unicodedata
+import hashlib
+import gzip
+import zlib
+import math
+import mmap
+import runpy
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
 import time
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Separator used when joining location keys into one searchable corpus
+LOCATION_SEPARATOR = '\x00'
+
+# Computed /api/get-rates results kept per (country, weight) and how long they stay fresh
+RATE_CACHE_SIZE = 4096
+RATE_CACHE_TTL_SECONDS = int(os.getenv('RATE_CACHE_TTL_SECONDS', '600'))
+# Lets browsers and shared caches reuse a successful rate response for a while too
+RATE_RESPONSE_CACHE_CONTROL = 'public, max-age=300, stale-while-revalidate=60'
+
+# Common alternative names used for a country in the rate sheets
+COUNTRY_VARIATIONS = {
+    'USA': ['UNITED STATES', 'AMERICA', 'US'],
+    'UK': ['UNITED KINGDOM', 'BRITAIN', 'ENGLAND'],
+    'UAE': ['UNITED ARAB EMIRATES'],
+    'CYPRUS': ['EUROPE'],  # Cyprus might be under Europe
+    'RUSSIA': ['RUSSIAN FEDERATION'],
+    'SOUTH KOREA': ['KOREA'],
+    'NORTH KOREA': ['KOREA']
+}
+
+# Uncached rate lookups allowed per client IP per minute (0 disables the limit)
+RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
+
+# Cheapest priced results returned per query; unpriced ('N/A') results are dropped
+MAX_RATE_RESULTS = 10
+
+# Maximum number of queries accepted by /api/get-rates-bulk
+MAX_BULK_QUERIES = 64
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by request.get_json() and jsonify()"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Frontend page under static/ and how long browsers may reuse it before revalidating
+INDEX_PAGE = 'index.html'
+INDEX_MAX_AGE_SECONDS = 3600
+# CSS/JS loaded by the page; they are served under a content-hashed name, so they never go stale
+FRONTEND_ASSETS = {'app.css': ('text/css', rcssmin.cssmin), 'app.js': ('text/javascript', rjsmin.jsmin)}
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# The service worker is revalidated on every check so a deploy reaches returning visitors
+SERVICE_WORKER = 'sw.js'
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# Brotli first, gzip as fallback; tiny bodies such as {"status": "ok"} aren't worth compressing
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+# Rate JSON is text: brotli's text mode at level 5 and gzip at 6 keep per-response CPU low
+app.config['COMPRESS_BR_MODE'] = brotli.MODE_TEXT
+app.config['COMPRESS_BR_LEVEL'] = 5
+app.config['COMPRESS_LEVEL'] = 6
+Compress(app)
+# Cloud Run / App Engine sit behind one proxy hop; trust its X-Forwarded-For for the client IP
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+class PrecompressedPage:
+    """Static file held in memory with its brotli/gzip variants and content-hash ETag built once"""
+    def __init__(self, body, mimetype, cache_control):
+        self.body = body
+        self.encoded = {
+            'br': brotli.compress(body, quality=11),
+            'gzip': gzip.compress(body, 9)
+        }
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # A strong ETag names one byte sequence, so each encoding gets its own
+        self.etags = {None: self.etag}
+        self.etags.update((encoding, f'{self.etag}-{encoding}') for encoding in self.encoded)
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+    
+    def response(self):
+        """304 when the client's copy is current, else the best encoding it accepts"""
+        encoding = request.accept_encodings.best_match(tuple(self.encoded))
+        # If-None-Match compares weakly, and a copy in any encoding is still current
+        # (proxies that recompress send back W/ tags)
+        if any(request.if_none_match.contains_weak(etag) for etag in self.etags.values()):
+            response = Response(status=304)
+        else:
+            response = Response(self.encoded.get(encoding, self.body), mimetype=self.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etags[encoding])
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+class StreamedPage(PrecompressedPage):
+    """PrecompressedPage sent as two chunks split after </head>, so the browser starts on the head's links early"""
+    def __init__(self, body, mimetype, cache_control):
+        super().__init__(body, mimetype, cache_control)
+        split_at = body.find(b'</head>')
+        split_at = len(body) if split_at < 0 else split_at + len(b'</head>')
+        head, rest = body[:split_at], body[split_at:]
+        # Each encoding is flushed at the split, so the compressed head decodes on its own
+        br = brotli.Compressor(quality=11)
+        gz = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self.chunks = {
+            None: (head, rest),
+            'br': (br.process(head) + br.flush(), br.process(rest) + br.finish()),
+            'gzip': (gz.compress(head) + gz.flush(zlib.Z_SYNC_FLUSH), gz.compress(rest) + gz.flush())
+        }
+    
+    def response(self):
+        """PrecompressedPage.response with the body streamed chunk by chunk"""
+        response = super().response()
+        if response.status_code == 200:
+            # Without a Content-Length the server sends the chunks as they are yielded
+            response.response = iter(self.chunks[response.headers.get('Content-Encoding')])
+            del response.headers['Content-Length']
+        return response
+
+def read_static_file(filename):
+    """Bytes of a file under static/"""
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        return f.read()
+
+# Comments and the indentation between tags on separate lines; spaces between inline tags stay
+HTML_COMMENT = re.compile(rb'<!--.*?-->', re.DOTALL)
+HTML_LINE_BREAK = re.compile(rb'>\s*\n\s*<')
+
+def minify_html(page):
+    """page without comments or the indentation between tags"""
+    return HTML_LINE_BREAK.sub(b'><', HTML_COMMENT.sub(b'', page)).strip()
+
+def load_frontend():
+    """(index page, {hashed name: asset}) with the page's asset links rewritten to the hashed URLs"""
+    try:
+        page = read_static_file(INDEX_PAGE)
+        assets = {}
+        for filename, (mimetype, minify) in FRONTEND_ASSETS.items():
+            body = minify(read_static_file(filename))
+            stem, ext = os.path.splitext(filename)
+            hashed_name = f"{stem}.{hashlib.blake2b(body, digest_size=4).hexdigest()}{ext}"
+            assets[hashed_name] = PrecompressedPage(body, mimetype, ASSET_CACHE_CONTROL)
+            # The page links /static/<file>, which also works when it is opened without this server
+            page = page.replace(f'/static/{filename}'.encode(), f'/assets/{hashed_name}'.encode())
+    except OSError as e:
+        logger.error(f"❌ Could not load the frontend: {e}")
+        return None, {}
+    return StreamedPage(minify_html(page), 'text/html', f'public, max-age={INDEX_MAX_AGE_SECONDS}'), assets
+
+INDEX, ASSETS = load_frontend()
+
+def load_service_worker(index, assets):
+    """sw.js with its shell cache versioned by, and pre-filled with, the current page and assets"""
+    if index is None:
+        return None
+    try:
+        script = read_static_file(SERVICE_WORKER)
+    except OSError as e:
+        logger.error(f"❌ Could not load the service worker: {e}")
+        return None
+    # The page links the hashed asset names, so its ETag changes whenever any shell file does
+    version = index.etag[:8]
+    urls = ['/'] + [f'/assets/{name}' for name in assets]
+    script = script.replace(b"const SHELL_VERSION = 'dev';", b'const SHELL_VERSION = ' + orjson.dumps(version) + b';')
+    script = script.replace(b"const SHELL_URLS = ['/'];", b'const SHELL_URLS = ' + orjson.dumps(urls) + b';')
+    return PrecompressedPage(rjsmin.jsmin(script), 'text/javascript', 'no-cache')
+
+SW_SCRIPT = load_service_worker(INDEX, ASSETS)
 
 # Configure CORS properly
+ALLOWED_ORIGINS = frozenset([
+    'https://keshavmajithia.github.io',
+    'http://localhost:3000',
+    'http://localhost:5000',
+    'http://localhost:8080'
+])
+
 CORS(app, 
-     origins=["https://keshavmajithia.github.io", "http://localhost:3000", "http://localhost:5000", "http://localhost:8080"],
+     origins=sorted(ALLOWED_ORIGINS),
      methods=["GET", "POST", "OPTIONS"],
      allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
      supports_credentials=False)
 
-# Alternative CORS setup using after_request (backup method)
+def normalize_text(text):
+    """NFC-normalize text so composed and decomposed accents compare equal; ASCII is returned as is"""
+    return text if text.isascii() else unicodedata.normalize('NFC', text)
+
+def ojsonify(obj, status=200):
+    """jsonify replacement that encodes with orjson straight to bytes"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+def rate_response(country, weight, results_json, total_found, zone_mappings_json, carriers_found):
+    """/api/get-rates body spliced around pre-encoded results and zone mappings"""
+    country_json = orjson.dumps(country)
+    weight_json = orjson.dumps(weight)
+    # Same keys and order as encoding the full response dict
+    body = b''.join((
+        b'{"country":', country_json,
+        b',"weight":', weight_json,
+        b',"data":{"zone_mappings":', zone_mappings_json,
+        b',"smart_response":{"results":', results_json,
+        b',"total_found":', orjson.dumps(total_found),
+        b',"search_country":', country_json,
+        b',"search_weight":', weight_json,
+        b',"analysis":', orjson.dumps(RateFinderService.describe_analysis(country, weight, total_found)),
+        b',"matches_found":', orjson.dumps(carriers_found),
+        b'}}}'
+    ))
+    response = Response(body, status=200, mimetype='application/json')
+    response.headers['Cache-Control'] = RATE_RESPONSE_CACHE_CONTROL
+    return response
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire ttl seconds after being stored"""
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+rate_response_cache = TTLCache(RATE_CACHE_SIZE, RATE_CACHE_TTL_SECONDS)
+
+class TokenBucketLimiter:
+    """Per-client token buckets holding `capacity` requests, refilled evenly over `period` seconds"""
+    def __init__(self, capacity, period=60.0, max_clients=10000):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def acquire(self, client):
+        """Take a token for client; returns 0 if allowed, else seconds until a token is free"""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.pop(client, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.refill_rate
+            # Most recently seen clients stay at the end; idle ones are dropped first
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+rate_limiter = TokenBucketLimiter(RATE_LIMIT_PER_MINUTE) if RATE_LIMIT_PER_MINUTE > 0 else None
+
+# Alternative CORS setup using after_request (backup method); the fixed headers are built once
+CORS_RESPONSE_HEADERS = {
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS, PUT, DELETE',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With',
+    'Access-Control-Allow-Credentials': 'false',
+    'Access-Control-Max-Age': '86400'
+}
+
+# The page loads only its own hashed CSS/JS and has no inline code, so nothing else needs allowing
+SECURITY_HEADERS = {
+    'Strict-Transport-Security': 'max-age=31536000',
+    'Content-Security-Policy': "default-src 'self'; style-src 'self'; script-src 'self'",
+    'X-Content-Type-Options': 'nosniff'
+}
+
 @app.after_request
 def after_request(response):
     origin = request.headers.get('Origin')
-    allowed_origins = [
-        'https://keshavmajithia.github.io',
-        'http://localhost:3000',
-        'http://localhost:5000',
-        'http://localhost:8080'
-    ]
-    
-    if origin in allowed_origins:
-        response.headers['Access-Control-Allow-Origin'] = origin
-    else:
-        response.headers['Access-Control-Allow-Origin'] = '*'
-    
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS, PUT, DELETE'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
-    response.headers['Access-Control-Allow-Credentials'] = 'false'
-    response.headers['Access-Control-Max-Age'] = '86400'
+    response.headers['Access-Control-Allow-Origin'] = origin if origin in ALLOWED_ORIGINS else '*'
+    response.headers.update(CORS_RESPONSE_HEADERS)
+    response.headers.update(SECURITY_HEADERS)
     return response
 
 # Rate Finding Service (replaces Gemini)
 class RateFinderService:
     def __init__(self):
+        self._variation_terms = self._build_variation_terms(COUNTRY_VARIATIONS)
         logger.info("✅ Rate finder service initialized")
     
-    def analyze_shipping_rates(self, country, weight, relevant_data):
+    def analyze_shipping_rates(self, country, weight, relevant_data, country_upper=None):
         """Comprehensive search that finds ALL matches programmatically"""
         logger.info(f"🔍 Starting comprehensive search for {country} at {weight}kg")
         
         all_matches = []
-        country_upper = country.upper().strip()
+        # (carrier, service, location_key) of every match added so far
+        seen = set()
+        country_upper = country_upper or country.upper().strip()
+        
+        country_len = len(country_upper)
         
         # Get carriers data
         carriers = relevant_data.get('carriers', {})
         zone_mappings = relevant_data.get('zone_mappings', {})
+        location_uppers = relevant_data.get('location_upper', {})
+        zone_locations = relevant_data.get('zone_locations', {})
         
-        # Debug: Log what we're searching for
-        logger.info(f"🔎 Searching for: '{country}' (normalized: '{country_upper}')")
-        logger.info(f"📊 Available carriers: {list(carriers.keys())}")
+        # Per-location tracing is DEBUG only; formatting it per location dominated request time
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("🔎 Searching for: '%s' (normalized: '%s')", country, country_upper)
+            logger.debug("📊 Available carriers: %s", list(carriers.keys()))
         
         # 1. DIRECT COUNTRY MATCHES - Search all carriers and services
         for carrier_name, carrier_data in carriers.items():
             services = carrier_data.get('services', {})
-            logger.info(f"🔍 Checking {carrier_name} with services: {list(services.keys())}")
+            if debug:
+                logger.debug("🔍 Checking %s with services: %s", carrier_name, list(services.keys()))
             
             for service_name, service_data in services.items():
-                location_keys = list(service_data.keys())
-                logger.info(f"  📍 {carrier_name}-{service_name} locations: {location_keys[:5]}{'...' if len(location_keys) > 5 else ''}")
+                if debug:
+                    location_keys = list(service_data.keys())
+                    logger.debug("  📍 %s-%s locations: %s%s", carrier_name, service_name,
+                                 location_keys[:5], '...' if len(location_keys) > 5 else '')
                 
                 # Check each location key in this service
-                for location_key, rate_data in service_data.items():
-                    location_upper = location_key.upper()
+                for location_key in service_data:
+                    location_upper = location_uppers[location_key]
                     
                     # More flexible matching
                     is_match = False
@@ -88,12 +376,13 @@ class RateFinderService:
                     if country_upper == location_upper:
                         is_match = True
                         match_reason = "exact"
-                    # Country contains location (e.g., "USA" in "USA ZONE 1")
-                    elif country_upper in location_upper:
+                    # Country contains location (e.g., "USA" in "USA ZONE 1"); only a longer key can
+                    # contain the country, and only a shorter one can be contained in it
+                    elif len(location_upper) > country_len and country_upper in location_upper:
                         is_match = True
                         match_reason = "country_in_location"
                     # Location contains country (e.g., "UNITED STATES" contains "USA")
-                    elif location_upper in country_upper:
+                    elif len(location_upper) < country_len and location_upper in country_upper:
                         is_match = True
                         match_reason = "location_in_country"
                     # Special cases for common country variations
@@ -101,183 +390,122 @@ class RateFinderService:
                         is_match = True
                         match_reason = "variation"
                     
-                    if is_match:
-                        # Check if weight is available
-                        weight_valid = self._has_valid_weight(rate_data, weight)
+                    if is_match and (carrier_name, service_name, location_key) not in seen:
+                        seen.add((carrier_name, service_name, location_key))
                         all_matches.append({
                             "carrier": carrier_name,
                             "service": service_name,
                             "location_key": location_key,
                             "match_type": "direct_country",
-                            "match_reason": match_reason,
-                            "weight_available": weight_valid
+                            "match_reason": match_reason
                         })
-                        logger.info(f"✅ Direct match ({match_reason}): {carrier_name} {service_name} -> {location_key} (weight_valid={weight_valid})")
+                        if debug:
+                            logger.debug("✅ Direct match (%s): %s %s -> %s",
+                                         match_reason, carrier_name, service_name, location_key)
         
         # 2. ZONE-BASED MATCHES - Check zone mappings for each carrier
-        logger.info(f"🌍 Starting zone-based search...")
+        if debug:
+            logger.debug("🌍 Starting zone-based search...")
         
         for zone_carrier, zone_mapping in zone_mappings.items():
             carrier_key = next((ck for ck in carriers if ck.lower() == zone_carrier.lower()), None)
             if carrier_key:
-                logger.info(f"🔍 Checking {carrier_key} ({zone_carrier}) zone mappings...")
+                if debug:
+                    logger.debug("🔍 Checking %s (%s) zone mappings...", carrier_key, zone_carrier)
                 
                 # Find zone for this country
                 country_zone = None
+                country_zone_key = None
                 matched_zone_country = None
                 
-                for mapped_country, zone in zone_mapping.items():
-                    mapped_upper = mapped_country.upper()
-                    
+                for mapped_country, mapped_upper, zone, zone_key in zone_mapping:
                     # More comprehensive zone matching
                     if (country_upper == mapped_upper or
                         country_upper in mapped_upper or 
                         mapped_upper in country_upper or
                         self._is_country_variation(country_upper, mapped_upper)):
                         country_zone = zone
+                        country_zone_key = zone_key
                         matched_zone_country = mapped_country
-                        logger.info(f"🎯 Found zone mapping: {country} -> {mapped_country} -> Zone {zone}")
+                        if debug:
+                            logger.debug("🎯 Found zone mapping: %s -> %s -> Zone %s", country, mapped_country, zone)
                         break
                 
                 if country_zone:
+                    zone_str = str(country_zone).upper()
+                    # service -> location keys containing the zone, precomputed by DataManager
+                    service_zone_locations = zone_locations.get((carrier_key, zone_str), {})
+                    
                     # Look for services with this zone
                     services = carriers[carrier_key].get('services', {})
                     for service_name, service_data in services.items():
+                        zone_location_keys = service_zone_locations.get(service_name)
+                        if not zone_location_keys:
+                            continue
                         
                         # Look for zone-based location keys
                         zone_matches = []
                         
-                        for location_key, rate_data in service_data.items():
-                            location_upper = location_key.upper()
-                            zone_str = str(country_zone).upper()
-                            
-                            logger.info(f"🔍 Checking location: '{location_key}' (upper: '{location_upper}') for zone '{country_zone}' (str: '{zone_str}')")
-                            
-                            # Multiple zone matching patterns
-                            zone_patterns = [
-                                f"ZONE {zone_str}",  # "ZONE I", "ZONE 8"
-                                f"ZONE{zone_str}",   # "ZONEI", "ZONE8"
-                                f"Z{zone_str}",      # "ZI", "Z8"
-                                zone_str             # "I", "8"
-                            ]
-                            
-                            is_zone_match = False
-                            match_pattern = None
-                            
-                            for pattern in zone_patterns:
-                                logger.info(f"  🔎 Testing pattern: '{pattern}' vs '{location_upper}'")
-                                if location_upper == pattern:
-                                    is_zone_match = True
-                                    match_pattern = pattern
-                                    logger.info(f"  ✅ EXACT MATCH: '{pattern}'")
-                                    break
-                                # Also check if pattern is contained in location
-                                elif pattern in location_upper:
-                                    is_zone_match = True
-                                    match_pattern = pattern
-                                    logger.info(f"  ✅ CONTAINS MATCH: '{pattern}' in '{location_upper}'")
-                                    break
-                                else:
-                                    logger.info(f"  ❌ No match: '{pattern}'")
-                            
-                            logger.info(f"🎯 Zone matching result: '{location_key}' -> {is_zone_match} (pattern: {match_pattern})")
-                            
-                            if is_zone_match:
-                                weight_valid = self._has_valid_weight(rate_data, weight)
-                                logger.info(f"⚖️ Weight validation for {location_key}: {weight_valid}")
-                                
-                                # Include match even if weight validation fails for debugging
+                        for location_key in service_data:
+                            if location_key in zone_location_keys:
                                 zone_matches.append({
                                     "carrier": carrier_key,
                                     "service": service_name,
                                     "location_key": location_key,
                                     "match_type": "zone_based",
                                     "zone": country_zone,
-                                    "zone_country": matched_zone_country,
-                                    "weight_available": weight_valid
+                                    "zone_key": country_zone_key,
+                                    "zone_country": matched_zone_country
                                 })
-                                logger.info(f"✅ Added zone match: {carrier_key} {service_name} -> {location_key} (weight_valid={weight_valid})")
+                                if debug:
+                                    logger.debug("✅ Added zone match: %s %s -> %s",
+                                                 carrier_key, service_name, location_key)
                         
                         # Add all zone matches for this service
                         for match in zone_matches:
                             # Avoid duplicates
-                            match_exists = any(
-                                m['carrier'] == carrier_key and 
-                                m['service'] == service_name and 
-                                m['location_key'] == location_key 
-                                for m in all_matches
-                            )
+                            match_id = (carrier_key, service_name, match['location_key'])
                             
-                            if not match_exists:
+                            if match_id not in seen:
+                                seen.add(match_id)
                                 all_matches.append(match)
-                                logger.info(f"✅ Zone match: {carrier_key} {service_name} -> {match['location_key']} (Zone {country_zone} via {matched_zone_country})")
-                            else:
-                                logger.info(f"⚠️ Duplicate match skipped: {carrier_key} {service_name} -> {location_key}")
-                else:
-                    logger.info(f"⚠️ No zone mapping found for {country} in {carrier_key}")
+                                if debug:
+                                    logger.debug("✅ Zone match: %s %s -> %s (Zone %s via %s)", carrier_key, service_name,
+                                                 match['location_key'], country_zone, matched_zone_country)
+                            elif debug:
+                                logger.debug("⚠️ Duplicate match skipped: %s %s -> %s", carrier_key, service_name, match['location_key'])
+                elif debug:
+                    logger.debug("⚠️ No zone mapping found for %s in %s", country, carrier_key)
         
         logger.info(f"🎯 Found {len(all_matches)} total matches for {country}")
         
         return {
-            "analysis": f"Smart search found {len(all_matches)} shipping options for {country} at {weight}kg",
+            "analysis": self.describe_analysis(country, weight, len(all_matches)),
             "matches_found": all_matches,
             "total_carriers_found": len(set(match['carrier'] for match in all_matches))
         }
     
-    def _has_valid_weight(self, rate_data, target_weight):
-        """Check if rate data has valid weight tier for target weight"""
-        logger.debug(f"Checking rate_data: {rate_data}")
-        if not isinstance(rate_data, dict):
-            logger.debug(f"Rate data is not dict: {type(rate_data)}, data: {rate_data}")
-            return False
-        
-        # Look for weight keys (numbers)
-        weight_keys = []
-        for key in rate_data.keys():
-            try:
-                weight_val = float(key)
-                weight_keys.append(weight_val)
-            except (ValueError, TypeError):
-                logger.debug(f"Invalid weight key: {key} (type: {type(key)})")
-                continue
-        
-        logger.debug(f"Available weights for target {target_weight}kg: {sorted(weight_keys)}")
-        
-        if not weight_keys:
-            logger.debug("No valid weight keys found in rate data")
-            return False
-        
-        # Use ceiling approach - find smallest weight >= target_weight
-        target_float = float(target_weight)
-        valid_weights = [w for w in weight_keys if w >= target_float]
-        
-        logger.debug(f"Valid weights (>= {target_float}kg): {valid_weights}")
-        return len(valid_weights) > 0
+    @staticmethod
+    def describe_analysis(country, weight, match_count):
+        """Summary line shown with the results"""
+        return f"Smart search found {match_count} shipping options for {country} at {weight}kg"
+    
+    @staticmethod
+    def _build_variation_terms(variations):
+        """Flatten {country: [variations]} into {name: (names it is known by)}, both directions"""
+        terms = {}
+        for main_country, var_list in variations.items():
+            terms.setdefault(main_country, []).extend(var_list)
+            for variation in var_list:
+                terms.setdefault(variation, []).append(main_country)
+        return {name: tuple(names) for name, names in terms.items()}
     
     def _is_country_variation(self, country_upper, location_upper):
         """Check for common country name variations"""
-        variations = {
-            'USA': ['UNITED STATES', 'AMERICA', 'US'],
-            'UK': ['UNITED KINGDOM', 'BRITAIN', 'ENGLAND'],
-            'UAE': ['UNITED ARAB EMIRATES'],
-            'CYPRUS': ['EUROPE'],  # Cyprus might be under Europe
-            'RUSSIA': ['RUSSIAN FEDERATION'],
-            'SOUTH KOREA': ['KOREA'],
-            'NORTH KOREA': ['KOREA']
-        }
-        
-        # Check if country has known variations
-        if country_upper in variations:
-            for variation in variations[country_upper]:
-                if variation in location_upper or location_upper in variation:
-                    return True
-        
-        # Check reverse mapping
-        for main_country, var_list in variations.items():
-            if country_upper in var_list:
-                if main_country in location_upper or location_upper in main_country:
-                    return True
-        
+        # Most countries have no known variations, which is now a single dict miss
+        for term in self._variation_terms.get(country_upper, ()):
+            if term in location_upper or location_upper in term:
+                return True
         return False
 
 # Initialize rate finder service
@@ -287,6 +515,17 @@ rate_finder_service = RateFinderService()
 class DataManager:
     def __init__(self):
         self.master_data = None
+        self.service_entries = []
+        self.location_index = {}
+        self.location_upper = {}
+        self.zone_index = {}
+        self.zone_mapping_entries = {}
+        self.rate_index = {}
+        self._location_uppers = []
+        self._location_corpus = ''
+        self._location_offsets = []
+        self._location_lengths = ()
+        self._country_index = {}
         self.load_master_json()
     
     def load_master_json(self):
@@ -304,8 +543,17 @@ class DataManager:
             for json_path in possible_paths:
                 if os.path.exists(json_path):
                     logger.info(f"📁 Found master JSON at: {json_path}")
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        self.master_data = json.load(f)
+                    # Parse straight from a read-only mapping of the file: orjson reads the
+                    # page-cache bytes directly, without first copying the file into a bytes object
+                    with open(json_path, 'rb') as f, \
+                            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                            memoryview(mapped) as view:
+                        self.master_data = orjson.loads(view)
+                    self._build_indexes()
+                    # Results computed against previously loaded data are stale now
+                    self._relevant_data_for_country_upper.cache_clear()
+                    self.zone_mappings_for_country.cache_clear()
+                    self._country_index = self._build_country_index()
                     logger.info(f"✅ Loaded {len(self.master_data.get('carriers', {}))} carriers")
                     return True
             
@@ -316,49 +564,205 @@ class DataManager:
             logger.error(f"❌ Error loading master JSON: {e}")
             return False
     
-    @lru_cache(maxsize=128)
+    def _build_indexes(self):
+        """Build reverse indexes over master_data once so lookups skip the nested carrier/service walk"""
+        self.service_entries = []
+        self.location_index = {}
+        self.location_upper = {}
+        self.zone_index = {}
+        self.zone_mapping_entries = {}
+        self.rate_index = {}
+        self.zone_location_index = {}
+        
+        # location_key.upper() -> [(position, carrier, service, location_key)]; position keeps master order
+        position = 0
+        for carrier_name, carrier_data in self.master_data.get('carriers', {}).items():
+            for service_name, service_data in carrier_data.get('services', {}).items():
+                # location_key -> tuple of weight keys, shared by every relevant_data built from this load
+                service_tiers = {
+                    location_key: tuple(weight_data.keys())
+                    for location_key, weight_data in service_data.items()
+                }
+                self.service_entries.append((carrier_name, carrier_name.lower(), service_name, service_tiers))
+                for location_key in service_data:
+                    location_upper = self.location_upper.setdefault(location_key, normalize_text(location_key.upper()))
+                    self.location_index.setdefault(location_upper, []).append(
+                        (position, carrier_name, service_name, location_key)
+                    )
+                    position += 1
+                    # (carrier, service, location_key) -> (weight_data, presorted tiers) for the rate lookup
+                    weight_data = service_data[location_key]
+                    self.rate_index[(carrier_name, service_name, location_key)] = (
+                        weight_data, self._build_weight_tiers(weight_data)
+                    )
+        
+        # All unique location keys joined into one string so "country in location" is a str.find sweep,
+        # plus the distinct key lengths so "location in country" only probes the country's substrings
+        location_uppers = self._location_uppers = list(self.location_index)
+        self._location_corpus = LOCATION_SEPARATOR.join(location_uppers)
+        self._location_offsets = []
+        offset = 0
+        for location_upper in location_uppers:
+            self._location_offsets.append(offset)
+            offset += len(location_upper) + len(LOCATION_SEPARATOR)
+        self._location_offsets.append(offset)
+        self._location_lengths = tuple(sorted({len(location_upper) for location_upper in location_uppers}))
+        
+        for zone_carrier, zone_mapping in self.master_data.get('zone_mappings', {}).items():
+            # Normalize each zone to its location key once: 8 -> "ZONE 8", "ZONE A" stays as is
+            zone_keys = [
+                (mapped_country, zone, f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone))
+                for mapped_country, zone in zone_mapping.items()
+            ]
+            # zone_carrier -> ((mapped_country, mapped_country.upper(), zone, rate lookup key), ...) for the analysis pass
+            self.zone_mapping_entries[zone_carrier] = tuple(
+                (mapped_country, normalize_text(mapped_country.upper()), zone, zone_key.upper())
+                for mapped_country, zone, zone_key in zone_keys
+            )
+            # carrier.lower() -> [(mapped_country.upper(), zone_key)]
+            self.zone_index.setdefault(zone_carrier.lower(), []).extend(
+                (normalize_text(mapped_country.upper()), zone_key)
+                for mapped_country, _, zone_key in zone_keys
+            )
+        
+        # (carrier, zone) -> {service: location keys containing the zone}; every spelling the
+        # analysis accepts ("ZONE 8", "ZONE8", "Z8", "8") contains the bare zone
+        carriers = self.master_data.get('carriers', {})
+        carrier_names = {carrier_name.lower(): carrier_name for carrier_name in carriers}
+        for zone_carrier, zone_mapping in self.master_data.get('zone_mappings', {}).items():
+            carrier_name = carrier_names.get(zone_carrier.lower())
+            if carrier_name is None:
+                continue
+            services = carriers[carrier_name].get('services', {})
+            for zone_str in {str(zone).upper() for zone in zone_mapping.values()}:
+                self.zone_location_index[(carrier_name, zone_str)] = {
+                    service_name: frozenset(
+                        location_key for location_key in service_data
+                        if zone_str in self.location_upper[location_key]
+                    )
+                    for service_name, service_data in services.items()
+                }
+        
+        logger.info(f"🗂️ Indexed {position} locations ({len(self.location_index)} unique) across {len(self.service_entries)} services")
+    
+    @staticmethod
+    def _build_weight_tiers(weight_data):
+        """Sorted tier weights with their (tier key, rate_info) rows aligned for a bisect lookup"""
+        try:
+            weights = sorted(float(w) for w in weight_data)
+        except (ValueError, TypeError):
+            # Leave malformed tiers to the per-request path, which reports them per match
+            return None
+        tier_keys = [str(w) for w in weights]
+        if not all(tier_key in weight_data for tier_key in tier_keys):
+            # Keys like "1" resolve to tier "1.0", which the per-request path reports as missing
+            return None
+        return weights, [(tier_key, weight_data[tier_key]) for tier_key in tier_keys]
+    
+    def _matching_locations(self, country_upper):
+        """Unique uppercase location keys that contain, or are contained in, country_upper"""
+        if not country_upper:
+            return set(self.location_index)
+        
+        location_uppers = self._location_uppers
+        matches = set()
+        
+        # Locations containing the country: scan the joined corpus, jumping to the next key after each hit
+        if LOCATION_SEPARATOR not in country_upper:
+            corpus = self._location_corpus
+            offsets = self._location_offsets
+            start = corpus.find(country_upper)
+            while start != -1:
+                idx = bisect_right(offsets, start) - 1
+                matches.add(location_uppers[idx])
+                start = corpus.find(country_upper, offsets[idx + 1])
+        
+        # Locations contained in the country: probe each substring whose length some location key has
+        country_len = len(country_upper)
+        for length in self._location_lengths:
+            if length > country_len:
+                break
+            for start in range(country_len - length + 1):
+                piece = country_upper[start:start + length]
+                if piece in self.location_index:
+                    matches.add(piece)
+        
+        return matches
+    
+    @lru_cache(maxsize=512)
+    def zone_mappings_for_country(self, country_upper):
+        """Per-carrier zone of the first mapping matching country_upper, as {'fedex_zone': zone, ...}"""
+        zone_mappings = {}
+        for zone_carrier, zone_entries in self.zone_mapping_entries.items():
+            for _, mapped_upper, zone, _ in zone_entries:
+                if country_upper in mapped_upper or mapped_upper in country_upper:
+                    zone_mappings[f'{zone_carrier.lower()}_zone'] = zone
+                    break
+        return zone_mappings
+    
     def get_relevant_data_for_country(self, country):
-        """Cached method to get relevant data for country"""
+        """Get relevant data for country, cached on the normalized country name"""
+        country_upper = country.upper()
+        relevant_data = self._country_index.get(country_upper)
+        if relevant_data is None:
+            # Free-text input outside the known names is computed on demand
+            relevant_data = self._relevant_data_for_country_upper(country_upper)
+        return relevant_data
+    
+    def _build_country_index(self):
+        """Relevant data for every location key and zone-mapped country name, computed once per load"""
+        country_names = set(self.location_upper.values())
+        for zone_mapping in self.master_data.get('zone_mappings', {}).values():
+            country_names.update(normalize_text(mapped_country.upper()) for mapped_country in zone_mapping)
+        return {
+            country_upper: self._compute_relevant_data(country_upper)
+            for country_upper in country_names
+        }
+    
+    @lru_cache(maxsize=512)
+    def _relevant_data_for_country_upper(self, country_upper):
+        """Cached lookup of carriers/services serving country_upper"""
+        return self._compute_relevant_data(country_upper)
+    
+    def _compute_relevant_data(self, country_upper):
+        """Carriers/services serving country_upper"""
         if not self.master_data:
             return {}
         
         relevant_data = {
             "carriers": {},
-            "zone_mappings": self.master_data.get("zone_mappings", {})
+            "zone_mappings": self.zone_mapping_entries,
+            "location_upper": self.location_upper,
+            "zone_locations": self.zone_location_index
         }
         
-        country_upper = country.upper()
-        carriers = self.master_data.get('carriers', {})
+        # Direct matches, grouped per (carrier, service)
+        direct_hits = {}
+        for location_upper in self._matching_locations(country_upper):
+            for posting in self.location_index[location_upper]:
+                direct_hits.setdefault((posting[1], posting[2]), []).append(posting)
         
-        for carrier_name, carrier_data in carriers.items():
-            services = carrier_data.get('services', {})
-            relevant_services = {}
+        # Zone-based matches: zone keys this country maps to, per carrier
+        zone_hits = {
+            carrier_lower: [
+                zone_key for mapped_upper, zone_key in zone_entries
+                if country_upper in mapped_upper or mapped_upper in country_upper
+            ]
+            for carrier_lower, zone_entries in self.zone_index.items()
+        }
+        
+        for carrier_name, carrier_lower, service_name, service_tiers in self.service_entries:
+            service_subset = {}
             
-            for service_name, service_data in services.items():
-                has_country_data = False
-                service_subset = {}
-                
-                # Check direct country matches
-                for location_key in service_data.keys():
-                    if country_upper in location_key.upper() or location_key.upper() in country_upper:
-                        has_country_data = True
-                        service_subset[location_key] = list(service_data[location_key].keys())
-                
-                # Check zone-based matches
-                for zone_carrier, zone_mapping in relevant_data["zone_mappings"].items():
-                    if zone_carrier.lower() == carrier_name.lower():
-                        for mapped_country, zone in zone_mapping.items():
-                            if country_upper in mapped_country.upper() or mapped_country.upper() in country_upper:
-                                zone_key = f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone)
-                                if zone_key in service_data:
-                                    has_country_data = True
-                                    service_subset[zone_key] = list(service_data[zone_key].keys())
-                
-                if has_country_data:
-                    relevant_services[service_name] = service_subset
+            for _, _, _, location_key in sorted(direct_hits.get((carrier_name, service_name), ())):
+                service_subset[location_key] = service_tiers[location_key]
             
-            if relevant_services:
-                relevant_data["carriers"][carrier_name] = {"services": relevant_services}
+            for zone_key in zone_hits.get(carrier_lower, ()):
+                if zone_key in service_tiers:
+                    service_subset[zone_key] = service_tiers[zone_key]
+            
+            if service_subset:
+                relevant_data["carriers"].setdefault(carrier_name, {"services": {}})["services"][service_name] = service_subset
         
         return relevant_data
 
@@ -383,17 +787,18 @@ class RateCalculator:
     @staticmethod
     def find_best_weight_match(weight, available_weights):
         """Find best weight tier using ceiling approach"""
-        weight = float(weight)
-        available_weights = [float(w) for w in available_weights]
-        available_weights.sort()
-        
-        for w in available_weights:
-            if w >= weight:
-                return str(w)
-        return None
+        available_weights = sorted(float(w) for w in available_weights)
+        idx = bisect_left(available_weights, float(weight))
+        return str(available_weights[idx]) if idx < len(available_weights) else None
+    
+    @staticmethod
+    def find_weight_tier(weight, tier_weights, tier_rows):
+        """Ceiling lookup over weight tiers presorted by DataManager, returning (tier key, rate_info)"""
+        idx = bisect_left(tier_weights, float(weight))
+        return tier_rows[idx] if idx < len(tier_rows) else (None, None)
     
     @staticmethod
-    def get_actual_rates_from_matches(matches, weight, master_data):
+    def get_actual_rates_from_matches(matches, weight, master_data, rate_index):
         """Process matches to get actual rates"""
         results = []
         
@@ -403,24 +808,18 @@ class RateCalculator:
                 service = match['service']
                 location_key = match['location_key']
                 
-                service_data = master_data['carriers'][carrier]['services'][service]
-                
                 if match['match_type'] == 'zone_based' and match.get('zone'):
-                    zone = match['zone']
-                    actual_location_key = f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone)
-                    actual_location_key = actual_location_key.upper()  # Normalize to match JSON
+                    # Normalized ("ZONE x") and uppercased once at load by DataManager
+                    actual_location_key = match['zone_key']
                 else:
                     actual_location_key = location_key  # Use original case first
                 
-                # Try original location_key first, then uppercase
-                weight_data = None
-                if actual_location_key in service_data:
-                    weight_data = service_data[actual_location_key]
-                elif actual_location_key.upper() in service_data:
-                    weight_data = service_data[actual_location_key.upper()]
-                elif actual_location_key.lower() in service_data:
-                    weight_data = service_data[actual_location_key.lower()]
-                else:
+                # Try original location_key first, then uppercase, then lowercase
+                rate_entry = (rate_index.get((carrier, service, actual_location_key)) or
+                              rate_index.get((carrier, service, actual_location_key.upper())) or
+                              rate_index.get((carrier, service, actual_location_key.lower())))
+                if rate_entry is None:
+                    service_data = master_data['carriers'][carrier]['services'][service]
                     logger.error(f"Location key {actual_location_key} not found in service_data: {list(service_data.keys())}")
                     results.append({
                         'carrier': carrier,
@@ -437,11 +836,14 @@ class RateCalculator:
                     })
                     continue
                 
-                available_weights = list(weight_data.keys())
-                best_weight = RateCalculator.find_best_weight_match(weight, available_weights)
+                weight_data, tiers = rate_entry
+                if tiers:
+                    best_weight, rate_info = RateCalculator.find_weight_tier(weight, *tiers)
+                else:
+                    best_weight = RateCalculator.find_best_weight_match(weight, list(weight_data.keys()))
+                    rate_info = weight_data[best_weight] if best_weight in weight_data else None
                 
-                if best_weight and best_weight in weight_data:
-                    rate_info = weight_data[best_weight]
+                if best_weight and (tiers or best_weight in weight_data):
                     
                     # Create result object
                     result = {
@@ -467,6 +869,7 @@ class RateCalculator:
                     
                     results.append(result)
                 else:
+                    available_weights = list(weight_data.keys())
                     logger.error(f"No valid weight tier found for {carrier} {service} {actual_location_key}. Available weights: {available_weights}")
                     results.append({
                         'carrier': carrier,
@@ -519,46 +922,55 @@ class RateCalculator:
             return f"{location_key} ({actual_location_key})"
         return location_key
 
+def form_number(value):
+    """Form field as the int or float a JSON body would have carried, so both give identical responses"""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
 # API Routes
-@app.route('/api/get-rates', methods=['POST', 'OPTIONS'])
-def get_rates():
-    """Main API endpoint for getting shipping rates"""
+def answer_rate_query(data, client_ip):
+    """Response for one {country, weight} query, served from the rate cache when possible"""
+    country = normalize_text(data.get('country', '').strip())
+    weight = data.get('weight', 0)
     
-    # Handle preflight OPTIONS request
-    if request.method == 'OPTIONS':
-        logger.info("📥 Handling OPTIONS preflight request")
-        response = jsonify({'status': 'ok'})
-        return response, 200
+    if not country:
+        return ojsonify({'error': 'Country is required'}, 400)
     
-    try:
-        logger.info(f"📥 POST request from origin: {request.headers.get('Origin')}")
-        
-        # Get and validate request data
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'Invalid JSON data'}), 400
-        
-        country = data.get('country', '').strip()
-        weight = data.get('weight', 0)
-        
-        if not country:
-            return jsonify({'error': 'Country is required'}), 400
-        
-        if not weight or float(weight) <= 0:
-            return jsonify({'error': 'Valid weight is required'}), 400  # FIXED: was jupytext
-        
-        # Validate weight format
-        is_valid, error_msg = RateCalculator.validate_weight_input(weight)
-        if not is_valid:
-            return jsonify({'error': error_msg}), 400
-        
-        # Check if master data is loaded
-        if not data_manager.master_data:
-            logger.error("❌ Master data not loaded")
-            return jsonify({
-                'error': 'Master shipping data not loaded',
-                'details': 'courier_rates_master.json file is missing or invalid'
-            }), 500
+    if not weight or float(weight) <= 0:
+        return ojsonify({'error': 'Valid weight is required'}, 400)  # FIXED: was jupytext
+    
+    # Validate weight format
+    is_valid, error_msg = RateCalculator.validate_weight_input(weight)
+    if not is_valid:
+        return ojsonify({'error': error_msg}, 400)
+    
+    # Check if master data is loaded
+    if not data_manager.master_data:
+        logger.error("❌ Master data not loaded")
+        return ojsonify({
+            'error': 'Master shipping data not loaded',
+            'details': 'courier_rates_master.json file is missing or invalid'
+        }, 500)
+    
+    # Matching is case-insensitive, so "usa" and "USA" share one computed result; rate
+    # calculations format the weight as sent, so 2 and 2.0 are kept apart
+    country_upper = country.upper()
+    cache_key = (country_upper, str(weight))
+    cached = rate_response_cache.get(cache_key)
+    
+    if cached is None:
+        # Only uncached lookups are limited; cache hits cost nothing to serve
+        wait = rate_limiter.acquire(client_ip) if rate_limiter else 0
+        if wait:
+            logger.warning(f"🚦 Rate limit hit for {client_ip}")
+            response = ojsonify({'error': 'Too many rate requests, please try again shortly'}, 429)
+            response.headers['Retry-After'] = str(math.ceil(wait))
+            return response
         
         logger.info(f"🔍 Processing request: {country}, {weight}kg")
         
@@ -567,16 +979,18 @@ def get_rates():
         
         if not relevant_data.get('carriers'):
             logger.warning(f"⚠️ No shipping data found for {country}")
-            return jsonify({
+            return ojsonify({
                 'error': f'No shipping data found for {country}',
                 'country': country,
                 'weight': weight
-            }), 404
+            }, 404)
         
         logger.info(f"📊 Found relevant data for {len(relevant_data['carriers'])} carriers")
         
         # Use smart rate finder for analysis (no Gemini)
-        analysis_result = rate_finder_service.analyze_shipping_rates(country, weight, relevant_data)
+        analysis_result = rate_finder_service.analyze_shipping_rates(
+            country, weight, relevant_data, country_upper=country_upper
+        )
         
         logger.info(f"🤖 Smart finder found {analysis_result.get('total_carriers_found', 0)} matches")
         
@@ -584,59 +998,131 @@ def get_rates():
         rate_results = RateCalculator.get_actual_rates_from_matches(
             analysis_result.get('matches_found', []), 
             weight, 
-            data_manager.master_data
+            data_manager.master_data,
+            data_manager.rate_index
         )
         
+        # Priced results only, cheapest first, so the page renders them in order as they arrive
+        rate_results = [result for result in rate_results if result['rate'] != 'N/A']
+        rate_results.sort(key=itemgetter('final_rate'))
+        del rate_results[MAX_RATE_RESULTS:]
+        
         # Prepare zone mappings for response
-        zone_mappings = {}
-        for carrier_name in ['fedex', 'dhl', 'ups']:
-            zone_mapping = data_manager.master_data.get('zone_mappings', {}).get(carrier_name, {})
-            country_upper = country.upper()
-            for mapped_country, zone in zone_mapping.items():
-                if country_upper in mapped_country.upper() or mapped_country.upper() in country_upper:
-                    zone_mappings[f'{carrier_name}_zone'] = zone
-                    break
+        zone_mappings = data_manager.zone_mappings_for_country(country_upper)
         
-        logger.info(f"✅ Returning {len(rate_results)} rate results")
+        # The bulky parts are encoded once here; hits only encode the echoed fields around them.
+        # The counts describe the results actually sent, not every match
+        cached = (
+            orjson.dumps(rate_results),
+            len(rate_results),
+            orjson.dumps(zone_mappings),
+            len(set(result['carrier'] for result in rate_results))
+        )
+        rate_response_cache.set(cache_key, cached)
+    else:
+        logger.info(f"⚡ Rate cache hit for {country}, {weight}kg")
+    
+    results_json, total_found, zone_mappings_json, carriers_found = cached
+    
+    logger.info(f"✅ Returning {total_found} rate results")
+    
+    return rate_response(country, weight, results_json, total_found, zone_mappings_json, carriers_found)
+
+@app.route('/api/get-rates', methods=['POST', 'OPTIONS'])
+def get_rates():
+    """Main API endpoint for getting shipping rates"""
+    
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        logger.info("📥 Handling OPTIONS preflight request")
+        response = ojsonify({'status': 'ok'})
+        return response, 200
+    
+    try:
+        logger.info(f"📥 POST request from origin: {request.headers.get('Origin')}")
         
-        # Prepare response
-        response_data = {
-            'country': country,
-            'weight': weight,
-            'data': {
-                'zone_mappings': zone_mappings,
-                'smart_response': {
-                    'results': rate_results,
-                    'total_found': len(rate_results),
-                    'search_country': country,
-                    'search_weight': weight,
-                    'analysis': analysis_result.get('analysis', ''),
-                    'matches_found': analysis_result.get('total_carriers_found', 0)
-                }
-            }
-        }
+        # Get and validate request data; the page posts a form, other clients JSON
+        if request.mimetype == 'application/x-www-form-urlencoded':
+            data = {'country': request.form.get('country', ''), 'weight': form_number(request.form.get('weight', '0'))}
+        else:
+            data = request.get_json()
+        if not data:
+            return ojsonify({'error': 'Invalid JSON data'}), 400
+        
+        return answer_rate_query(data, request.remote_addr)
+        
+    except Exception as e:
+        logger.error(f"❌ Server error: {str(e)}")
+        # Formatting the stack is only worth it when someone is reading DEBUG logs
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("❌ Traceback: %s", traceback.format_exc())
+        return ojsonify({'error': f'Server error: {str(e)}'}), 500
+
+def bulk_query_entry(query, client_ip):
+    """One /api/get-rates-bulk entry: the /api/get-rates body for query with its status folded in"""
+    if not isinstance(query, dict):
+        body, status = orjson.dumps({'error': 'Each query must be an object'}), 400
+    else:
+        try:
+            response = answer_rate_query(query, client_ip)
+            body, status = response.get_data(), response.status_code
+        except Exception as e:
+            logger.error(f"❌ Bulk query {query} failed: {e}")
+            body, status = orjson.dumps({'error': f'Server error: {str(e)}'}), 500
+    # Every body is a JSON object, so the status goes in as its last key
+    return body[:-1] + b',"status":' + str(status).encode() + b'}'
+
+@app.route('/api/get-rates-bulk', methods=['POST', 'OPTIONS'])
+def get_rates_bulk():
+    """Answer several {country, weight} queries in a single round-trip"""
+    
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return ojsonify({'status': 'ok'}), 200
+    
+    try:
+        data = request.get_json(silent=True)
+        queries = data.get('queries') if isinstance(data, dict) else data
+        if not isinstance(queries, list) or not queries:
+            return ojsonify({'error': 'Expected a non-empty list of {country, weight} queries'}), 400
+        
+        if len(queries) > MAX_BULK_QUERIES:
+            return ojsonify({'error': f'At most {MAX_BULK_QUERIES} queries are allowed per batch'}), 413
         
-        return jsonify(response_data), 200
+        logger.info(f"📥 Bulk request with {len(queries)} queries")
+        
+        # Identical queries in one batch are answered once
+        entries = {}
+        results = []
+        for query in queries:
+            key = orjson.dumps(query, option=orjson.OPT_SORT_KEYS)
+            if key not in entries:
+                entries[key] = bulk_query_entry(query, request.remote_addr)
+            results.append(entries[key])
+        
+        body = b'{"results":[' + b','.join(results) + b'],"total_queries":' + str(len(results)).encode() + b'}'
+        return Response(body, status=200, mimetype='application/json')
         
     except Exception as e:
         logger.error(f"❌ Server error: {str(e)}")
-        logger.error(f"❌ Traceback: {traceback.format_exc()}")
-        return jsonify({'error': f'Server error: {str(e)}'}), 500
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("❌ Traceback: %s", traceback.format_exc())
+        return ojsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/carriers', methods=['GET'])
 def get_carriers():
     """Get list of available carriers"""
     if not data_manager.master_data:
-        return jsonify({'error': 'Master data not loaded'}), 500
+        return ojsonify({'error': 'Master data not loaded'}), 500
     
     carriers = list(data_manager.master_data.get('carriers', {}).keys())
-    return jsonify({'carriers': carriers}), 200
+    return ojsonify({'carriers': carriers}), 200
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     status = "healthy" if data_manager.master_data else "unhealthy"
-    return jsonify({
+    return ojsonify({
         'status': status,
         'master_data_loaded': data_manager.master_data is not None,
         'carriers_count': len(data_manager.master_data.get('carriers', {})) if data_manager.master_data else 0,
@@ -646,436 +1132,79 @@ def health_check():
 @app.route('/')
 def index():
     """Serve the frontend"""
-    return '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Majithia International Courier - Professional Rate Finder</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * { box-sizing: border-box; }
-            body { 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                margin: 0; 
-                padding: 20px; 
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-            }
-            .container { 
-                max-width: 1200px; 
-                margin: 0 auto; 
-                background: white; 
-                padding: 40px; 
-                border-radius: 15px; 
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            }
-            .header {
-                text-align: center;
-                margin-bottom: 40px;
-                border-bottom: 3px solid #007bff;
-                padding-bottom: 20px;
-            }
-            h1 { 
-                color: #2c3e50; 
-                margin: 0; 
-                font-size: 2.5em;
-                font-weight: 700;
-            }
-            .subtitle {
-                color: #7f8c8d;
-                font-size: 1.2em;
-                margin: 10px 0;
-            }
-            .smart-badge { 
-                background: linear-gradient(45deg, #28a745, #20c997); 
-                color: white; 
-                padding: 8px 16px; 
-                border-radius: 20px; 
-                font-size: 14px;
-                font-weight: 600;
-                display: inline-block;
-                margin-top: 10px;
-            }
-            .form-section {
-                background: #f8f9fa;
-                padding: 30px;
-                border-radius: 10px;
-                margin-bottom: 30px;
-                border: 2px solid #e9ecef;
-            }
-            .form-group { 
-                margin-bottom: 25px; 
-            }
-            label { 
-                display: block; 
-                margin-bottom: 8px; 
-                font-weight: 600; 
-                color: #495057; 
-                font-size: 16px;
-            }
-            input[type="text"] { 
-                width: 100%; 
-                padding: 15px; 
-                border: 2px solid #dee2e6; 
-                border-radius: 8px; 
-                font-size: 16px;
-                transition: border-color 0.3s;
-            }
-            input[type="text"]:focus {
-                outline: none;
-                border-color: #007bff;
-                box-shadow: 0 0 0 3px rgba(0,123,255,0.25);
-            }
-            .weight-control {
-                display: flex;
-                align-items: center;
-                gap: 15px;
-                justify-content: center;
-                background: white;
-                padding: 15px;
-                border-radius: 10px;
-                border: 2px solid #dee2e6;
-            }
-            .weight-btn {
-                width: 50px;
-                height: 50px;
-                font-size: 24px;
-                font-weight: bold;
-                border: none;
-                border-radius: 50%;
-                cursor: pointer;
-                transition: all 0.3s;
-                color: white;
-            }
-            .weight-btn.decrease {
-                background: linear-gradient(45deg, #dc3545, #c82333);
-            }
-            .weight-btn.increase {
-                background: linear-gradient(45deg, #28a745, #218838);
-            }
-            .weight-btn:hover {
-                transform: scale(1.1);
-                box-shadow: 0 5px 15px rgba(0,0,0,0.3);
-            }
-            .weight-display {
-                font-size: 28px;
-                font-weight: bold;
-                color: #007bff;
-                min-width: 80px;
-                text-align: center;
-                background: #f8f9fa;
-                padding: 10px 20px;
-                border-radius: 8px;
-                border: 2px solid #007bff;
-            }
-            .weight-note {
-                color: #6c757d;
-                font-size: 14px;
-                text-align: center;
-                margin-top: 10px;
-                font-style: italic;
-            }
-            .search-btn { 
-                background: linear-gradient(45deg, #007bff, #0056b3); 
-                color: white; 
-                padding: 18px 50px; 
-                border: none; 
-                border-radius: 10px; 
-                cursor: pointer; 
-                font-size: 18px;
-                font-weight: 600;
-                width: 100%;
-                transition: all 0.3s;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }
-            .search-btn:hover { 
-                background: linear-gradient(45deg, #0056b3, #004085);
-                transform: translateY(-2px);
-                box-shadow: 0 10px 25px rgba(0,123,255,0.4);
-            }
-            .results { margin-top: 40px; }
-            .analysis { 
-                background: linear-gradient(135deg, #e3f2fd, #bbdefb); 
-                border: 2px solid #2196f3; 
-                border-radius: 10px; 
-                padding: 20px; 
-                margin-bottom: 25px;
-                font-size: 16px;
-            }
-            .rate-card { 
-                background: white; 
-                border: 2px solid #e9ecef; 
-                border-radius: 12px; 
-                padding: 25px; 
-                margin-bottom: 20px;
-                transition: all 0.3s;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }
-            .rate-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 10px 30px rgba(0,0,0,0.15);
-                border-color: #007bff;
-            }
-            .carrier-name { 
-                font-size: 22px; 
-                font-weight: bold; 
-                color: #007bff; 
-                margin-bottom: 15px;
-                border-bottom: 2px solid #e9ecef;
-                padding-bottom: 10px;
-            }
-            .rate-details { 
-                display: grid; 
-                grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); 
-                gap: 15px; 
-            }
-            .detail-item { 
-                background: #f8f9fa; 
-                padding: 15px; 
-                border-radius: 8px; 
-                border-left: 4px solid #007bff;
-                font-size: 14px;
-            }
-            .detail-item strong {
-                color: #495057;
-                display: block;
-                margin-bottom: 5px;
-            }
-            .error { 
-                color: #dc3545; 
-                background: #f8d7da; 
-                padding: 20px; 
-                border-radius: 8px; 
-                margin-top: 20px;
-                border: 2px solid #dc3545;
-                font-weight: 600;
-            }
-            .loading { 
-                text-align: center; 
-                color: #007bff; 
-                margin-top: 30px;
-                font-size: 18px;
-                font-weight: 600;
-            }
-            .no-results { 
-                text-align: center; 
-                color: #6c757d; 
-                background: #e9ecef; 
-                padding: 30px; 
-                border-radius: 10px; 
-                margin-top: 30px;
-                font-size: 18px;
-            }
-            .results-header {
-                background: linear-gradient(135deg, #28a745, #20c997);
-                color: white;
-                padding: 20px;
-                border-radius: 10px;
-                margin-bottom: 25px;
-                text-align: center;
-            }
-            .results-header h3 {
-                margin: 0;
-                font-size: 24px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Majithia International Courier</h1>
-                <div class="subtitle">Professional International Shipping Rate Calculator</div>
-                <div class="smart-badge">Smart Rate Finder</div>
-            </div>
-            
-            <div class="form-section">
-                <div class="form-group">
-                    <label for="country">Destination Country:</label>
-                    <input type="text" id="country" placeholder="e.g., Canada, Australia, UAE, Singapore" />
-                </div>
-                
-                <div class="form-group">
-                    <label>Package Weight (kg):</label>
-                    <div class="weight-control">
-                        <button type="button" class="weight-btn decrease" onclick="decreaseWeight()">−</button>
-                        <div class="weight-display" id="weight-display">0.5</div>
-                        <button type="button" class="weight-btn increase" onclick="increaseWeight()">+</button>
-                    </div>
-                    <div class="weight-note">Weight increments: 0.5kg steps only (0.5, 1.0, 1.5, 2.0...)</div>
-                </div>
-                
-                <button class="search-btn" onclick="findRates()">Find Best Shipping Rates</button>
-            </div>
-            
-            <div id="results" class="results"></div>
-        </div>
+    if INDEX is None:
+        abort(404)
+    return INDEX.response()
 
-        <script>
-            let currentWeight = 0.5;
-            
-            function updateWeightDisplay() {
-                document.getElementById('weight-display').textContent = currentWeight.toFixed(1);
-            }
-            
-            function increaseWeight() {
-                currentWeight += 0.5;
-                updateWeightDisplay();
-            }
-            
-            function decreaseWeight() {
-                if (currentWeight > 0.5) {
-                    currentWeight -= 0.5;
-                    updateWeightDisplay();
-                }
-            }
-            
-            async function findRates() {
-                const country = document.getElementById('country').value.trim();
-                const weight = currentWeight;
-                const resultsDiv = document.getElementById('results');
-                
-                if (!country) {
-                    resultsDiv.innerHTML = '<div class="error">Please enter a destination country.</div>';
-                    return;
-                }
-                
-                resultsDiv.innerHTML = '<div class="loading">Smart rate finder is searching for best rates...</div>';
-                
-                try {
-                    console.log('Making request with:', { country, weight });
-                    
-                    const response = await fetch('/api/get-rates', {
-                        method: 'POST',
-                        headers: { 
-                            'Content-Type': 'application/json',
-                            'Accept': 'application/json'
-                        },
-                        body: JSON.stringify({ country, weight })
-                    });
-                    
-                    console.log('Response status:', response.status);
-                    
-                    if (!response.ok) {
-                        throw new Error(`HTTP error! status: ${response.status}`);
-                    }
-                    
-                    const data = await response.json();
-                    console.log('Response data:', data);
-                    
-                    if (data.error) {
-                        resultsDiv.innerHTML = `<div class="error">${data.error}</div>`;
-                        return;
-                    }
-                    
-                    // Check if we have valid data structure
-                    if (!data.data || !data.data.smart_response) {
-                        console.error('Invalid response structure:', data);
-                        resultsDiv.innerHTML = '<div class="error">Invalid response from server</div>';
-                        return;
-                    }
-                    
-                    const smartData = data.data.smart_response;
-                    
-                    if (!smartData.results || smartData.results.length === 0) {
-                        resultsDiv.innerHTML = '<div class="no-results">No shipping options available for this destination and weight combination.</div>';
-                        return;
-                    }
-                    
-                    // Display results
-                    let html = `
-                        <div class="results-header">
-                            <h3>Found ${smartData.total_found} shipping options for ${data.country} (${data.weight}kg)</h3>
-                        </div>
-                    `;
-                    
-                    if (smartData.analysis) {
-                        html += `<div class="analysis"><strong>Smart Analysis:</strong> ${smartData.analysis}</div>`;
-                    }
-                    
-                    // Sort by final_rate (lowest first)
-                    const sortedResults = [...smartData.results].sort((a, b) => {
-                        const rateA = parseFloat(a.final_rate) || 0;
-                        const rateB = parseFloat(b.final_rate) || 0;
-                        return rateA - rateB;
-                    });
-                    
-                    sortedResults.forEach((rate, index) => {
-                        let rankBadge = '';
-                        if (index === 0 && parseFloat(rate.final_rate) > 0) rankBadge = ' - BEST RATE ⭐';
-                        else if (index === 1 && parseFloat(rate.final_rate) > 0) rankBadge = ' - 2nd Best';
-                        else if (index === 2 && parseFloat(rate.final_rate) > 0) rankBadge = ' - 3rd Best';
-                        
-                        html += `
-                            <div class="rate-card">
-                                <div class="carrier-name">${rate.carrier} - ${rate.service_type}${rankBadge}</div>
-                                <div class="rate-details">
-                                    <div class="detail-item">
-                                        <strong>Rate:</strong> ${rate.rate}
-                                    </div>
-                                    <div class="detail-item">
-                                        <strong>Calculation:</strong> ${rate.calculation}
-                                    </div>
-                                    <div class="detail-item">
-                                        <strong>Match:</strong> ${rate.matched_country}
-                                    </div>
-                                    <div class="detail-item">
-                                        <strong>Weight Tier:</strong> ${rate.weight_tier}kg
-                                    </div>
-                                    <div class="detail-item">
-                                        <strong>Method:</strong> ${rate.match_type.replace('_', ' ')}
-                                    </div>
-                                    ${rate.zone ? `<div class="detail-item"><strong>Zone:</strong> ${rate.zone}</div>` : ''}
-                                    ${rate.reasoning ? `<div class="detail-item"><strong>Details:</strong> ${rate.reasoning}</div>` : ''}
-                                </div>
-                            </div>
-                        `;
-                    });
-                    
-                    resultsDiv.innerHTML = html;
-                    
-                } catch (error) {
-                    console.error('Network error:', error);
-                    resultsDiv.innerHTML = `<div class="error">Network error: ${error.message}. Please check the console for more details.</div>`;
-                }
-            }
-            
-            // Allow Enter key to trigger search
-            document.addEventListener('keypress', function(e) {
-                if (e.key === 'Enter') {
-                    findRates();
-                }
-            });
-            
-            // Initialize weight display
-            updateWeightDisplay();
-        </script>
-    </body>
-    </html>
-    '''
+@app.route('/sw.js')
+def service_worker():
+    """Service worker caching the page shell and recent rate quotes"""
+    if SW_SCRIPT is None:
+        abort(404)
+    return SW_SCRIPT.response()
+
+@app.route('/assets/<filename>')
+def frontend_asset(filename):
+    """Content-hashed CSS/JS linked from the frontend page"""
+    asset = ASSETS.get(filename)
+    if asset is None:
+        abort(404)
+    return asset.response()
+
+# Error handlers; their bodies never change, so they are encoded once
+NOT_FOUND_BODY = orjson.dumps({'error': 'Endpoint not found'})
+INTERNAL_ERROR_BODY = orjson.dumps({'error': 'Internal server error'})
 
-# Error handlers
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return Response(NOT_FOUND_BODY, status=404, mimetype='application/json')
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
+    return Response(INTERNAL_ERROR_BODY, status=500, mimetype='application/json')
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    # gunicorn doesn't run on Windows; `python app_smart_fixed.py` needs FLASK_DEBUG=1 there
+    BaseApplication = object
+
+class GunicornServer(BaseApplication):
+    """Runs the app under gunicorn with the settings in gunicorn.conf.py, for `python app_smart_fixed.py`"""
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+    
+    def load_config(self):
+        # Same lookup gunicorn does for -c: module-level names that are gunicorn settings
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+        if os.path.exists(config_path):
+            for key, value in runpy.run_path(config_path).items():
+                if key in self.cfg.settings:
+                    self.cfg.set(key, value)
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+    
+    def load(self):
+        return self.application
 
 if __name__ == '__main__':
-    print("Starting Majithia International Courier Rate Finder...")
-    print("Smart shipping rate calculator with intelligent matching")
+    port = int(os.getenv('PORT', 5000))
+    
+    logger.info("Starting Majithia International Courier Rate Finder...")
+    logger.info("Smart shipping rate calculator with intelligent matching")
     
     if data_manager.master_data:
-        print("Ready to serve professional rate requests!")
-        print("Access your app at: http://localhost:5000")
+        logger.info("Ready to serve professional rate requests!")
+        logger.info("Access your app at: http://localhost:%s", port)
     else:
-        print("Master data not loaded. Starting server anyway for debugging...")
-        print("Access your app at: http://localhost:5000")
+        logger.error("Master data not loaded. Starting server anyway for debugging...")
+        logger.info("Access your app at: http://localhost:%s", port)
     
-    # Use different configurations for development vs production
-    debug_mode = os.getenv('FLASK_ENV') == 'development'
-    port = int(os.getenv('PORT', 5000))
-    
-    app.run(debug=debug_mode, host='0.0.0.0', port=port)
\ No newline at end of file
+    # Debugger and reloader only when explicitly asked for; otherwise serve with gunicorn workers
+    debug_mode = os.getenv('FLASK_DEBUG') == '1' or os.getenv('FLASK_ENV') == 'development'
+    if debug_mode:
+        app.run(debug=True, host='0.0.0.0', port=port)
+    else:
+        GunicornServer(app, {'bind': f"0.0.0.0:{port}"}).run()
\ No newline at end of file
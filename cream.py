@@ -1,23 +1,132 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, abort, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import json
+from flask_compress import Compress
+import orjson
+import brotli
 import os
 import traceback
 import google.generativeai as genai
+from google.api_core.exceptions import ResourceExhausted
 from dotenv import load_dotenv
 import logging
-from functools import lru_cache
+import re
+from functools import cache, lru_cache
+from bisect import bisect_left
+from collections import OrderedDict, deque
+import hashlib
+import gzip
+import mmap
+import threading
+import unicodedata
 import time
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum number of (country, weight) rate results kept in memory
+RATE_RESULTS_CACHE_SIZE = 4096
+
+# Common alternative names used for a country in the rate sheets
+COUNTRY_VARIATIONS = {
+    'USA': ['UNITED STATES', 'AMERICA', 'US'],
+    'UK': ['UNITED KINGDOM', 'BRITAIN', 'ENGLAND'],
+    'UAE': ['UNITED ARAB EMIRATES'],
+    'CYPRUS': ['EUROPE'],  # Cyprus might be under Europe
+    'RUSSIA': ['RUSSIAN FEDERATION'],
+    'SOUTH KOREA': ['KOREA'],
+    'NORTH KOREA': ['KOREA']
+}
+
+# Maximum number of queries accepted by /api/get-rates-batch
+MAX_BATCH_QUERIES = 50
+
+# Gemini free-tier quota and retry policy for 429 (ResourceExhausted) responses
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '15'))
+GEMINI_MAX_ATTEMPTS = 5
+GEMINI_MAX_BACKOFF_SECONDS = 30
+
+# Shared by every per-key model; a more efficient model configuration
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+GENERATION_CONFIG = {
+    "temperature": 0.1,  # Lower temperature for more consistent results
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+# Key validation only needs the call to succeed, so don't pay for a full completion
+KEY_VALIDATION_CONFIG = {"max_output_tokens": 1}
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by request.get_json() and jsonify()"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Frontend page under static/ and how long browsers may reuse it before revalidating
+INDEX_PAGE = 'cream.html'
+INDEX_MAX_AGE_SECONDS = 3600
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# Brotli first, gzip as fallback; tiny bodies such as {"status": "ok"} aren't worth compressing
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+# Rate JSON is text: brotli's text mode at level 5 and gzip at 6 keep per-response CPU low
+app.config['COMPRESS_BR_MODE'] = brotli.MODE_TEXT
+app.config['COMPRESS_BR_LEVEL'] = 5
+app.config['COMPRESS_LEVEL'] = 6
+Compress(app)
+
+class PrecompressedPage:
+    """Static file held in memory with its brotli/gzip variants and content-hash ETag built once"""
+    def __init__(self, body, mimetype, cache_control):
+        self.body = body
+        self.encoded = {
+            'br': brotli.compress(body, quality=11),
+            'gzip': gzip.compress(body, 9)
+        }
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+    
+    def response(self):
+        """304 when the client's copy is current, else the best encoding it accepts"""
+        if request.if_none_match.contains(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = request.accept_encodings.best_match(tuple(self.encoded))
+            response = Response(self.encoded.get(encoding, self.body), mimetype=self.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = self.cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+def read_static_file(filename):
+    """Bytes of a file under static/"""
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        return f.read()
+
+def load_static_page(filename, max_age):
+    """PrecompressedPage for an HTML file under static/, or None when it is missing"""
+    try:
+        return PrecompressedPage(read_static_file(filename), 'text/html', f'public, max-age={max_age}')
+    except OSError as e:
+        logger.error(f"❌ Could not load static page {filename}: {e}")
+        return None
+
+INDEX = load_static_page(INDEX_PAGE, INDEX_MAX_AGE_SECONDS)
 
 # Configure CORS properly
 CORS(app, 
@@ -26,6 +135,14 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
      supports_credentials=False)
 
+def normalize_text(text):
+    """NFC-normalize text so composed and decomposed accents compare equal; ASCII is returned as is"""
+    return text if text.isascii() else unicodedata.normalize('NFC', text)
+
+def ojsonify(obj, status=200):
+    """jsonify replacement that encodes with orjson straight to bytes"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
 # Alternative CORS setup using after_request (backup method)
 @app.after_request
 def after_request(response):
@@ -48,78 +165,160 @@ def after_request(response):
     response.headers['Access-Control-Max-Age'] = '86400'
     return response
 
+class RateLimiter:
+    """Sliding-window limiter that blocks until a request slot is free"""
+    def __init__(self, max_calls, period=60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+    
+    def _expire(self, now):
+        while self._calls and now - self._calls[0] >= self.period:
+            self._calls.popleft()
+    
+    def remaining(self):
+        """Number of calls still available in the current window"""
+        with self._lock:
+            self._expire(time.monotonic())
+            return self.max_calls - len(self._calls)
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
 # Configure Gemini
 class GeminiService:
     def __init__(self):
-        self.api_key = os.getenv('VITE_GEMINI_API_KEY') or os.getenv('GEMINI_API_KEY')
+        self.api_keys = self._load_api_keys()
+        self.api_key = self.api_keys[0] if self.api_keys else None
         self.model = None
+        self.models = {}
         self.configured = False
+        self._variation_terms = self._build_variation_terms(COUNTRY_VARIATIONS)
+        self._rate_limiters = {key: RateLimiter(GEMINI_REQUESTS_PER_MINUTE) for key in self.api_keys}
         self._initialize()
     
+    @staticmethod
+    def _load_api_keys():
+        """Read GEMINI_API_KEYS (comma-separated), falling back to the single-key variables"""
+        keys = [key.strip() for key in os.getenv('GEMINI_API_KEYS', '').split(',') if key.strip()]
+        if not keys:
+            single_key = os.getenv('VITE_GEMINI_API_KEY') or os.getenv('GEMINI_API_KEY')
+            if single_key:
+                keys = [single_key]
+        # Drop duplicates while keeping the configured order
+        return list(dict.fromkeys(keys))
+    
     def _initialize(self):
-        if not self.api_key:
+        if not self.api_keys:
             logger.warning("⚠️  GEMINI_API_KEY not found in environment variables")
             return
         
+        for index, api_key in enumerate(self.api_keys, 1):
+            self._configure_key(api_key, index)
+        
+        if self.models:
+            self.model = next(iter(self.models.values()))
+            self.configured = True
+            logger.info(f"✅ Gemini API configured with {len(self.models)}/{len(self.api_keys)} valid key(s)")
+    
+    def _configure_key(self, api_key, index):
         try:
-            genai.configure(api_key=self.api_key)
-            # Use a more efficient model configuration
-            generation_config = {
-                "temperature": 0.1,  # Lower temperature for more consistent results
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
+            genai.configure(api_key=api_key)
+            # One long-lived model per key; its gRPC channel keeps a single HTTP/2
+            # connection open, so later calls skip the TCP/TLS handshake
+            model = genai.GenerativeModel(GEMINI_MODEL_NAME, generation_config=GENERATION_CONFIG)
             
-            self.model = genai.GenerativeModel(
-                'gemini-1.5-flash',
-                generation_config=generation_config
+            # Test the API key with a simple streamed request; the first chunk
+            # proves the key works, so don't wait for the full completion.
+            # The model binds its client on this first call, so it keeps using
+            # this key after genai.configure moves on to the next one.
+            first_chunk = self._call_with_backoff(
+                lambda m: next(iter(m.generate_content(
+                    "Test",
+                    stream=True,
+                    generation_config=KEY_VALIDATION_CONFIG
+                )), None),
+                api_key=api_key,
+                model=model
             )
-            
-            # Test the API key with a simple request
-            test_response = self.model.generate_content("Test")
-            if test_response:
-                self.configured = True
-                logger.info("✅ Gemini API configured and validated successfully")
+            if first_chunk:
+                self.models[api_key] = model
+                logger.info(f"✅ Gemini API key #{index} validated successfully")
             else:
                 raise Exception("API key validation failed")
                 
         except Exception as e:
             error_msg = str(e)
             if "API_KEY_INVALID" in error_msg or "expired" in error_msg.lower():
-                logger.error(f"❌ Gemini API key is invalid or expired: {error_msg}")
+                logger.error(f"❌ Gemini API key #{index} is invalid or expired: {error_msg}")
                 logger.error("💡 Please get a new API key from https://aistudio.google.com/app/apikey")
             else:
-                logger.error(f"❌ Error configuring Gemini API: {error_msg}")
-            self.configured = False
+                logger.error(f"❌ Error configuring Gemini API key #{index}: {error_msg}")
+    
+    def _pick_api_key(self):
+        """Key with the most quota left in the current window"""
+        return max(self.models, key=lambda key: self._rate_limiters[key].remaining())
+    
+    def _call_with_backoff(self, call, api_key=None, model=None):
+        """Run call(model) within a key's request quota, retrying 429s with exponential backoff"""
+        delay = 1
+        for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+            key = api_key or self._pick_api_key()
+            self._rate_limiters[key].acquire()
+            try:
+                return call(model or self.models[key])
+            except ResourceExhausted:
+                if attempt == GEMINI_MAX_ATTEMPTS:
+                    raise
+                logger.warning(f"⏳ Gemini quota exhausted, retrying in {delay}s (attempt {attempt}/{GEMINI_MAX_ATTEMPTS})")
+                time.sleep(delay)
+                delay = min(delay * 2, GEMINI_MAX_BACKOFF_SECONDS)
+    
+    @staticmethod
+    def describe_analysis(country, weight, match_count):
+        """Summary line shown with the results"""
+        return f"Comprehensive search found {match_count} shipping options for {country} at {weight}kg"
     
     def analyze_shipping_rates(self, country, weight, relevant_data):
         """Comprehensive search that finds ALL matches programmatically"""
         logger.info(f"🔍 Starting comprehensive search for {country} at {weight}kg")
         
         all_matches = []
+        # (carrier, service, location_key) of every match added so far
+        seen = set()
         country_upper = country.upper().strip()
         
+        country_len = len(country_upper)
+        
         # Get carriers data
         carriers = relevant_data.get('carriers', {})
         zone_mappings = relevant_data.get('zone_mappings', {})
+        location_uppers = relevant_data.get('location_upper', {})
         
         # Debug: Log what we're searching for
-        logger.info(f"🔎 Searching for: '{country}' (normalized: '{country_upper}')")
-        logger.info(f"📊 Available carriers: {list(carriers.keys())}")
+        logger.debug("🔎 Searching for: '%s' (normalized: '%s')", country, country_upper)
+        logger.debug("📊 Available carriers: %s", list(carriers))
         
         # 1. DIRECT COUNTRY MATCHES - Search all carriers and services
         for carrier_name, carrier_data in carriers.items():
             services = carrier_data.get('services', {})
-            logger.info(f"🔍 Checking {carrier_name} with services: {list(services.keys())}")
+            logger.debug("🔍 Checking %s with services: %s", carrier_name, list(services))
             
             for service_name, service_data in services.items():
-                location_keys = list(service_data.keys())
-                logger.info(f"  📍 {carrier_name}-{service_name} locations: {location_keys[:5]}{'...' if len(location_keys) > 5 else ''}")
+                logger.debug("  📍 %s-%s: %d locations", carrier_name, service_name, len(service_data))
                 
                 # Check each location key in this service
-                for location_key, rate_data in service_data.items():
-                    location_upper = location_key.upper()
+                for location_key in service_data:
+                    location_upper = location_uppers.get(location_key) or location_key.upper()
                     
                     # More flexible matching
                     is_match = False
@@ -129,12 +328,13 @@ class GeminiService:
                     if country_upper == location_upper:
                         is_match = True
                         match_reason = "exact"
-                    # Country contains location (e.g., "USA" in "USA ZONE 1")
-                    elif country_upper in location_upper:
+                    # Country contains location (e.g., "USA" in "USA ZONE 1"); only a longer key can
+                    # contain the country, and only a shorter one can be contained in it
+                    elif len(location_upper) > country_len and country_upper in location_upper:
                         is_match = True
                         match_reason = "country_in_location"
                     # Location contains country (e.g., "UNITED STATES" contains "USA")
-                    elif location_upper in country_upper:
+                    elif len(location_upper) < country_len and location_upper in country_upper:
                         is_match = True
                         match_reason = "location_in_country"
                     # Special cases for common country variations
@@ -142,32 +342,30 @@ class GeminiService:
                         is_match = True
                         match_reason = "variation"
                     
-                    if is_match:
-                        # Check if weight is available
-                        weight_valid = self._has_valid_weight(rate_data, weight)
+                    if is_match and (carrier_name, service_name, location_key) not in seen:
+                        seen.add((carrier_name, service_name, location_key))
                         all_matches.append({
                             "carrier": carrier_name,
                             "service": service_name,
                             "location_key": location_key,
                             "match_type": "direct_country",
-                            "match_reason": match_reason,
-                            "weight_available": weight_valid
+                            "match_reason": match_reason
                         })
-                        logger.info(f"✅ Direct match ({match_reason}): {carrier_name} {service_name} -> {location_key} (weight_valid={weight_valid})")
+                        logger.debug("✅ Direct match (%s): %s %s -> %s", match_reason, carrier_name, service_name, location_key)
         
         # 2. ZONE-BASED MATCHES - Check zone mappings for each carrier
-        logger.info(f"🌍 Starting zone-based search...")
+        logger.debug("🌍 Starting zone-based search...")
         
         for carrier_name, zone_mapping in zone_mappings.items():
             if carrier_name in carriers:
-                logger.info(f"🔍 Checking {carrier_name} zone mappings...")
+                logger.debug("🔍 Checking %s zone mappings...", carrier_name)
                 
                 # Find zone for this country
                 country_zone = None
                 matched_zone_country = None
                 
                 for mapped_country, zone in zone_mapping.items():
-                    mapped_upper = mapped_country.upper()
+                    mapped_upper = normalize_text(mapped_country.upper())
                     
                     # More comprehensive zone matching
                     if (country_upper == mapped_upper or
@@ -176,10 +374,14 @@ class GeminiService:
                         self._is_country_variation(country_upper, mapped_upper)):
                         country_zone = zone
                         matched_zone_country = mapped_country
-                        logger.info(f"🎯 Found zone mapping: {country} -> {mapped_country} -> Zone {zone}")
+                        logger.debug("🎯 Found zone mapping: %s -> %s -> Zone %s", country, mapped_country, zone)
                         break
                 
                 if country_zone:
+                    # Same zone for every location of this carrier
+                    zone_str = str(country_zone).upper()
+                    zone_pattern = self._zone_pattern(zone_str)
+                    
                     # Look for services with this zone
                     services = carriers[carrier_name].get('services', {})
                     for service_name, service_data in services.items():
@@ -187,74 +389,42 @@ class GeminiService:
                         # Look for zone-based location keys
                         zone_matches = []
                         
-                        for location_key, rate_data in service_data.items():
-                            location_upper = location_key.upper()
-                            zone_str = str(country_zone).upper()
-                            
-                            logger.info(f"🔍 Checking location: '{location_key}' (upper: '{location_upper}') for zone '{country_zone}' (str: '{zone_str}')")
+                        for location_key in service_data:
+                            location_upper = location_uppers.get(location_key) or location_key.upper()
                             
-                            # Multiple zone matching patterns
-                            zone_patterns = [
-                                f"ZONE {zone_str}",  # "ZONE I", "ZONE 8"
-                                f"ZONE{zone_str}",   # "ZONEI", "ZONE8"
-                                f"Z{zone_str}",      # "ZI", "Z8"
-                                zone_str             # "I", "8"
-                            ]
+                            logger.debug("🔍 Checking location: '%s' for zone '%s'", location_key, zone_str)
                             
-                            is_zone_match = False
-                            match_pattern = None
+                            # All zone spellings in one compiled search
+                            zone_match = zone_pattern.search(location_upper)
+                            is_zone_match = zone_match is not None
+                            match_pattern = zone_match.group(0) if zone_match else None
                             
-                            for pattern in zone_patterns:
-                                logger.info(f"  🔎 Testing pattern: '{pattern}' vs '{location_upper}'")
-                                if location_upper == pattern or pattern == location_upper:
-                                    is_zone_match = True
-                                    match_pattern = pattern
-                                    logger.info(f"  ✅ EXACT MATCH: '{pattern}'")
-                                    break
-                                # Also check if pattern is contained in location
-                                elif pattern in location_upper:
-                                    is_zone_match = True
-                                    match_pattern = pattern
-                                    logger.info(f"  ✅ CONTAINS MATCH: '{pattern}' in '{location_upper}'")
-                                    break
-                                else:
-                                    logger.info(f"  ❌ No match: '{pattern}'")
-                            
-                            logger.info(f"🎯 Zone matching result: '{location_key}' -> {is_zone_match} (pattern: {match_pattern})")
+                            logger.debug("🎯 Zone matching result: '%s' -> %s (pattern: %s)", location_key, is_zone_match, match_pattern)
                             
                             if is_zone_match:
-                                weight_valid = self._has_valid_weight(rate_data, weight)
-                                logger.info(f"⚖️ Weight validation for {location_key}: {weight_valid}")
-                                
-                                # Include match even if weight validation fails for debugging
                                 zone_matches.append({
                                     "carrier": carrier_name,
                                     "service": service_name,
                                     "location_key": location_key,
                                     "match_type": "zone_based",
                                     "zone": country_zone,
-                                    "zone_country": matched_zone_country,
-                                    "weight_available": weight_valid
+                                    "zone_country": matched_zone_country
                                 })
-                                logger.info(f"✅ Added zone match: {carrier_name} {service_name} -> {location_key} (weight_valid={weight_valid})")
+                                logger.debug("✅ Added zone match: %s %s -> %s", carrier_name, service_name, location_key)
                         
                         # Add all zone matches for this service
                         for match in zone_matches:
                             # Avoid duplicates
-                            match_exists = any(
-                                m['carrier'] == carrier_name and 
-                                m['service'] == service_name and 
-                                m['location_key'] == location_key 
-                                for m in all_matches
-                            )
+                            match_id = (carrier_name, service_name, match['location_key'])
                             
-                            if not match_exists:
+                            if match_id not in seen:
+                                seen.add(match_id)
                                 all_matches.append(match)
-                                logger.info(f"✅ Zone match: {carrier_name} {service_name} -> {match['location_key']} (Zone {country_zone} via {matched_zone_country})")
+                                logger.debug("✅ Zone match: %s %s -> %s (Zone %s via %s)", carrier_name, service_name, match['location_key'], country_zone, matched_zone_country)
                             else:
-                                logger.info(f"⚠️ Duplicate match skipped: {carrier_name} {service_name} -> {location_key}")
+                                logger.debug("⚠️ Duplicate match skipped: %s %s -> %s", carrier_name, service_name, match['location_key'])
                 else:
-                    logger.info(f"⚠️ No zone mapping found for {country} in {carrier_name}")
+                    logger.debug("⚠️ No zone mapping found for %s in %s", country, carrier_name)
         
         logger.info(f"🎯 Found {len(all_matches)} total matches for {country}")
         
@@ -264,60 +434,30 @@ class GeminiService:
             "total_carriers_found": len(set(match['carrier'] for match in all_matches))
         }
     
-    def _has_valid_weight(self, rate_data, target_weight):
-        """Check if rate data has valid weight tier for target weight"""
-        logger.debug(f"Checking rate_data: {rate_data}")
-        if not isinstance(rate_data, dict):
-            logger.debug(f"Rate data is not dict: {type(rate_data)}, data: {rate_data}")
-            return False
-        
-        # Look for weight keys (numbers)
-        weight_keys = []
-        for key in rate_data.keys():
-            try:
-                weight_val = float(key)
-                weight_keys.append(weight_val)
-            except (ValueError, TypeError):
-                logger.debug(f"Invalid weight key: {key} (type: {type(key)})")
-                continue
-        
-        logger.debug(f"Available weights for target {target_weight}kg: {sorted(weight_keys)}")
-        
-        if not weight_keys:
-            logger.debug("No valid weight keys found in rate data")
-            return False
-        
-        # Use ceiling approach - find smallest weight >= target_weight
-        target_float = float(target_weight)
-        valid_weights = [w for w in weight_keys if w >= target_float]
-        
-        logger.debug(f"Valid weights (>= {target_float}kg): {valid_weights}")
-        return len(valid_weights) > 0
+    @staticmethod
+    @cache
+    def _zone_pattern(zone_str):
+        """Compiled search for the ways a zone is written in location keys"""
+        zone = re.escape(zone_str)
+        # "ZONE I"/"ZONE 8", "ZONEI"/"ZONE8", "ZI"/"Z8", "I"/"8"; every spelling contains the bare zone
+        return re.compile(f"ZONE {zone}|ZONE{zone}|Z{zone}|{zone}")
+    
+    @staticmethod
+    def _build_variation_terms(variations):
+        """Flatten {country: [variations]} into {name: (names it is known by)}, both directions"""
+        terms = {}
+        for main_country, var_list in variations.items():
+            terms.setdefault(main_country, []).extend(var_list)
+            for variation in var_list:
+                terms.setdefault(variation, []).append(main_country)
+        return {name: tuple(names) for name, names in terms.items()}
     
     def _is_country_variation(self, country_upper, location_upper):
         """Check for common country name variations"""
-        variations = {
-            'USA': ['UNITED STATES', 'AMERICA', 'US'],
-            'UK': ['UNITED KINGDOM', 'BRITAIN', 'ENGLAND'],
-            'UAE': ['UNITED ARAB EMIRATES'],
-            'CYPRUS': ['EUROPE'],  # Cyprus might be under Europe
-            'RUSSIA': ['RUSSIAN FEDERATION'],
-            'SOUTH KOREA': ['KOREA'],
-            'NORTH KOREA': ['KOREA']
-        }
-        
-        # Check if country has known variations
-        if country_upper in variations:
-            for variation in variations[country_upper]:
-                if variation in location_upper or location_upper in variation:
-                    return True
-        
-        # Check reverse mapping
-        for main_country, var_list in variations.items():
-            if country_upper in var_list:
-                if main_country in location_upper or location_upper in main_country:
-                    return True
-        
+        # Most countries have no known variations, which is now a single dict miss
+        for term in self._variation_terms.get(country_upper, ()):
+            if term in location_upper or location_upper in term:
+                return True
         return False
     
     def _fix_json_response(self, response_text):
@@ -358,6 +498,14 @@ gemini_service = GeminiService()
 class DataManager:
     def __init__(self):
         self.master_data = None
+        self.data_version = None
+        self.zone_keys_by_carrier = {}
+        self.location_upper = {}
+        self.service_locations = []
+        self.weight_tiers = {}
+        self._location_uppers = frozenset()
+        self._location_lengths = ()
+        self._country_index = {}
         self.load_master_json()
     
     def load_master_json(self):
@@ -375,8 +523,19 @@ class DataManager:
             for json_path in possible_paths:
                 if os.path.exists(json_path):
                     logger.info(f"📁 Found master JSON at: {json_path}")
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        self.master_data = json.load(f)
+                    # Hash and parse straight from a read-only mapping of the file instead of
+                    # copying it into a bytes object first
+                    with open(json_path, 'rb') as f, \
+                            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                            memoryview(mapped) as view:
+                        self.master_data = orjson.loads(view)
+                        # Version tag so cached analyses are invalidated when the rate file changes
+                        self.data_version = hashlib.blake2b(view, digest_size=16).hexdigest()
+                    self._build_indexes()
+                    # Results computed against previously loaded data are stale now
+                    self._relevant_data_for_country_upper.cache_clear()
+                    self.zone_mappings_for_country.cache_clear()
+                    self._country_index = self._build_country_index()
                     logger.info(f"✅ Loaded {len(self.master_data.get('carriers', {}))} carriers")
                     return True
             
@@ -387,49 +546,143 @@ class DataManager:
             logger.error(f"❌ Error loading master JSON: {e}")
             return False
     
-    @lru_cache(maxsize=128)
+    def _build_indexes(self):
+        """Precompute uppercase location keys and per-carrier zone keys once per load"""
+        self.location_upper = {}
+        self.service_locations = []
+        self.weight_tiers = {}
+        for carrier_name, carrier_data in self.master_data.get('carriers', {}).items():
+            for service_name, service_data in carrier_data.get('services', {}).items():
+                for location_key, weight_data in service_data.items():
+                    tiers = self._build_weight_tiers(weight_data)
+                    if tiers:
+                        self.weight_tiers[(carrier_name, service_name, location_key)] = tiers
+                # (carrier, service, service_data, ((location_key, location_key.upper()), ...)) in master order
+                self.service_locations.append((carrier_name, service_name, service_data, tuple(
+                    (location_key, self.location_upper.setdefault(location_key, normalize_text(location_key.upper())))
+                    for location_key in service_data
+                )))
+        # Distinct uppercase keys, so per-country substring tests run once per spelling, and
+        # their lengths, so "location in country" probes only the country's substrings of those lengths
+        self._location_uppers = frozenset(self.location_upper.values())
+        self._location_lengths = tuple(sorted({len(location_upper) for location_upper in self._location_uppers}))
+        
+        # Group zone mappings by lowercased carrier with the "ZONE x" location key precomputed
+        self.zone_keys_by_carrier = {}
+        for zone_carrier, zone_mapping in self.master_data.get("zone_mappings", {}).items():
+            self.zone_keys_by_carrier.setdefault(zone_carrier.lower(), []).extend(
+                (normalize_text(mapped_country), f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone))
+                for mapped_country, zone in zone_mapping.items()
+            )
+    
+    @staticmethod
+    def _build_weight_tiers(weight_data):
+        """Weight keys cast to float and sorted once, with (tier key, rate_info) rows aligned to them"""
+        try:
+            weights = sorted(float(w) for w in weight_data)
+        except (ValueError, TypeError):
+            # Leave malformed tiers to the per-request path, which reports them per match
+            return None
+        tier_keys = [str(w) for w in weights]
+        if not all(tier_key in weight_data for tier_key in tier_keys):
+            # Keys like "1" resolve to tier "1.0", which the per-request path reports as missing
+            return None
+        return weights, [(tier_key, weight_data[tier_key]) for tier_key in tier_keys]
+    
+    @lru_cache(maxsize=1024)
+    def zone_mappings_for_country(self, country_upper):
+        """Per-carrier zone of the first mapping matching country_upper, as {'fedex_zone': zone, ...}"""
+        zone_mappings = {}
+        for zone_carrier, zone_mapping in self.master_data.get('zone_mappings', {}).items():
+            for mapped_country, zone in zone_mapping.items():
+                if country_upper in mapped_country or mapped_country in country_upper:
+                    zone_mappings[f'{zone_carrier.lower()}_zone'] = zone
+                    break
+        return zone_mappings
+    
     def get_relevant_data_for_country(self, country):
-        """Cached method to get relevant data for country"""
+        """Get relevant data for country, cached on the normalized country name"""
+        country_upper = country.strip().upper()
+        relevant_data = self._country_index.get(country_upper)
+        if relevant_data is None:
+            # Free-text input outside the known names is computed on demand
+            relevant_data = self._relevant_data_for_country_upper(country_upper)
+        return relevant_data
+    
+    def _build_country_index(self):
+        """Relevant data for every location key and zone-mapped country name, computed once per load"""
+        country_names = set(self.location_upper.values())
+        for zone_mapping in self.master_data.get('zone_mappings', {}).values():
+            country_names.update(normalize_text(mapped_country.upper()) for mapped_country in zone_mapping)
+        return {
+            country_upper: self._compute_relevant_data(country_upper)
+            for country_upper in country_names
+        }
+    
+    @lru_cache(maxsize=1024)
+    def _relevant_data_for_country_upper(self, country_upper):
+        """Cached lookup of carriers/services serving country_upper"""
+        return self._compute_relevant_data(country_upper)
+    
+    def _compute_relevant_data(self, country_upper):
+        """Carriers/services serving country_upper"""
         if not self.master_data:
             return {}
         
         relevant_data = {
             "carriers": {},
-            "zone_mappings": self.master_data.get("zone_mappings", {})
+            "zone_mappings": self.master_data.get("zone_mappings", {}),
+            "location_upper": self.location_upper
         }
         
-        country_upper = country.upper()
-        carriers = self.master_data.get('carriers', {})
+        matching_uppers = {
+            location_upper for location_upper in self._location_uppers
+            if country_upper in location_upper
+        }
+        # Locations contained in the country are set probes, an exact match being the first of them
+        for length in self._location_lengths:
+            if length > len(country_upper):
+                break
+            for start in range(len(country_upper) - length + 1):
+                piece = country_upper[start:start + length]
+                if piece in self._location_uppers:
+                    matching_uppers.add(piece)
+        carrier_zone_keys = {}
         
-        for carrier_name, carrier_data in carriers.items():
-            services = carrier_data.get('services', {})
-            relevant_services = {}
+        for carrier_name, service_name, service_data, locations in self.service_locations:
+            # Zone keys this country maps to for the carrier; the same for every service
+            zone_keys = carrier_zone_keys.get(carrier_name)
+            if zone_keys is None:
+                zone_keys = carrier_zone_keys[carrier_name] = [
+                    zone_key
+                    for mapped_country, zone_key in self.zone_keys_by_carrier.get(carrier_name.lower(), ())
+                    if country_upper in mapped_country or mapped_country in country_upper
+                ]
             
-            for service_name, service_data in services.items():
-                has_country_data = False
-                service_subset = {}
-                
-                # Check direct country matches
-                for location_key in service_data.keys():
-                    if country_upper in location_key.upper() or location_key.upper() in country_upper:
-                        has_country_data = True
-                        service_subset[location_key] = list(service_data[location_key].keys())
-                
-                # Check zone-based matches
-                for zone_carrier, zone_mapping in relevant_data["zone_mappings"].items():
-                    if zone_carrier.lower() == carrier_name.lower():
-                        for mapped_country, zone in zone_mapping.items():
-                            if country_upper in mapped_country or mapped_country in country_upper:
-                                zone_key = f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone)
-                                if zone_key in service_data:
-                                    has_country_data = True
-                                    service_subset[zone_key] = list(service_data[zone_key].keys())
-                
-                if has_country_data:
-                    relevant_services[service_name] = service_subset
+            has_country_data = False
+            service_subset = {}
+            
+            # Check direct country matches
+            for location_key, location_upper in locations:
+                if location_upper in matching_uppers:
+                    has_country_data = True
+                    service_subset[location_key] = list(service_data[location_key].keys())
             
-            if relevant_services:
-                relevant_data["carriers"][carrier_name] = {"services": relevant_services}
+            # Check zone-based matches
+            for zone_key in zone_keys:
+                if zone_key in service_data:
+                    has_country_data = True
+                    service_subset[zone_key] = list(service_data[zone_key].keys())
+            
+            if has_country_data:
+                relevant_data["carriers"].setdefault(carrier_name, {"services": {}})["services"][service_name] = service_subset
+        
+        # Only hand the analysis the zone mappings of carriers that have data for this country
+        relevant_data["zone_mappings"] = {
+            zone_carrier: zone_mapping
+            for zone_carrier, zone_mapping in relevant_data["zone_mappings"].items()
+            if zone_carrier in relevant_data["carriers"]
+        }
         
         return relevant_data
 
@@ -454,19 +707,23 @@ class RateCalculator:
     @staticmethod
     def find_best_weight_match(weight, available_weights):
         """Find best weight tier using ceiling approach"""
-        weight = float(weight)
-        available_weights = [float(w) for w in available_weights]
-        available_weights.sort()
-        
-        for w in available_weights:
-            if w >= weight:
-                return str(w)
-        return None
+        available_weights = sorted(float(w) for w in available_weights)
+        idx = bisect_left(available_weights, float(weight))
+        return str(available_weights[idx]) if idx < len(available_weights) else None
+    
+    @staticmethod
+    def find_weight_tier(weight, tier_weights, tier_rows):
+        """Ceiling lookup over weight tiers presorted by DataManager, returning (tier key, rate_info)"""
+        idx = bisect_left(tier_weights, float(weight))
+        return tier_rows[idx] if idx < len(tier_rows) else (None, None)
     
     @staticmethod
-    def get_actual_rates_from_matches(matches, weight, master_data):
+    def get_actual_rates_from_matches(matches, weight, master_data, weight_tiers=None):
         """Process Gemini matches to get actual rates"""
         results = []
+        weight_tiers = weight_tiers or {}
+        # zone -> normalized zone location key, shared by the matches of one request
+        zone_keys = {}
         
         for match in matches:
             try:
@@ -478,19 +735,21 @@ class RateCalculator:
                 
                 if match['match_type'] == 'zone_based' and match.get('zone'):
                     zone = match['zone']
-                    actual_location_key = f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone)
-                    actual_location_key = actual_location_key.upper()  # Normalize to match JSON
+                    actual_location_key = zone_keys.get(zone)
+                    if actual_location_key is None:
+                        actual_location_key = f"ZONE {zone}" if not str(zone).startswith("ZONE") else str(zone)
+                        actual_location_key = zone_keys[zone] = actual_location_key.upper()  # Normalize to match JSON
                 else:
                     actual_location_key = location_key  # Use original case first
                 
                 # Try original location_key first, then uppercase
-                weight_data = None
+                resolved_key = None
                 if actual_location_key in service_data:
-                    weight_data = service_data[actual_location_key]
+                    resolved_key = actual_location_key
                 elif actual_location_key.upper() in service_data:
-                    weight_data = service_data[actual_location_key.upper()]
+                    resolved_key = actual_location_key.upper()
                 elif actual_location_key.lower() in service_data:
-                    weight_data = service_data[actual_location_key.lower()]
+                    resolved_key = actual_location_key.lower()
                 else:
                     logger.error(f"Location key {actual_location_key} not found in service_data: {list(service_data.keys())}")
                     results.append({
@@ -508,11 +767,15 @@ class RateCalculator:
                     })
                     continue
                 
-                available_weights = list(weight_data.keys())
-                best_weight = RateCalculator.find_best_weight_match(weight, available_weights)
+                weight_data = service_data[resolved_key]
+                tiers = weight_tiers.get((carrier, service, resolved_key))
+                if tiers:
+                    best_weight, rate_info = RateCalculator.find_weight_tier(weight, *tiers)
+                else:
+                    best_weight = RateCalculator.find_best_weight_match(weight, list(weight_data.keys()))
+                    rate_info = weight_data[best_weight] if best_weight in weight_data else None
                 
-                if best_weight and best_weight in weight_data:
-                    rate_info = weight_data[best_weight]
+                if best_weight and (tiers or best_weight in weight_data):
                     
                     # Create result object
                     result = {
@@ -538,6 +801,7 @@ class RateCalculator:
                     
                     results.append(result)
                 else:
+                    available_weights = list(weight_data.keys())
                     logger.error(f"No valid weight tier found for {carrier} {service} {actual_location_key}. Available weights: {available_weights}")
                     results.append({
                         'carrier': carrier,
@@ -591,54 +855,49 @@ class RateCalculator:
         return location_key
 
 # API Routes
-@app.route('/api/get-rates', methods=['POST', 'OPTIONS'])
-def get_rates():
-    """Main API endpoint for getting shipping rates"""
+# Computed (rate_results, zone_mappings, match_count, carriers_found) per normalized query, in LRU order
+rate_results_cache = OrderedDict()
+rate_results_cache_lock = threading.Lock()
+
+def build_rate_response(data):
+    """Validate a single {country, weight} query and build its response payload and status code"""
+    country = normalize_text(str(data.get('country', '')).strip())
+    weight = data.get('weight', 0)
     
-    # Handle preflight OPTIONS request
-    if request.method == 'OPTIONS':
-        logger.info("📥 Handling OPTIONS preflight request")
-        response = jsonify({'status': 'ok'})
-        return response, 200
+    if not country:
+        return {'error': 'Country is required'}, 400
     
-    try:
-        logger.info(f"📥 POST request from origin: {request.headers.get('Origin')}")
-        
-        # Get and validate request data
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'Invalid JSON data'}), 400
-        
-        country = data.get('country', '').strip()
-        weight = data.get('weight', 0)
-        
-        if not country:
-            return jsonify({'error': 'Country is required'}), 400
-        
-        if not weight or float(weight) <= 0:
-            return jsonify({'error': 'Valid weight is required'}), 400
-        
-        # Validate weight format
-        is_valid, error_msg = RateCalculator.validate_weight_input(weight)
-        if not is_valid:
-            return jsonify({'error': error_msg}), 400
-        
-        # Check if master data is loaded
-        if not data_manager.master_data:
-            logger.error("❌ Master data not loaded")
-            return jsonify({
-                'error': 'Master shipping data not loaded',
-                'details': 'courier_rates_master.json file is missing or invalid'
-            }), 500
-        
-        # Check if Gemini is configured
-        if not gemini_service.configured:
-            logger.error("❌ Gemini API not configured")
-            return jsonify({
-                'error': 'AI service not available',
-                'details': 'Gemini API key not configured'
-            }), 500
-        
+    if not weight or float(weight) <= 0:
+        return {'error': 'Valid weight is required'}, 400
+    
+    # Validate weight format
+    is_valid, error_msg = RateCalculator.validate_weight_input(weight)
+    if not is_valid:
+        return {'error': error_msg}, 400
+    
+    # Check if master data is loaded
+    if not data_manager.master_data:
+        logger.error("❌ Master data not loaded")
+        return {
+            'error': 'Master shipping data not loaded',
+            'details': 'courier_rates_master.json file is missing or invalid'
+        }, 500
+    
+    # The rate search runs locally over master_data, so a missing or
+    # invalid Gemini key no longer blocks quotes
+    if not gemini_service.configured:
+        logger.warning("⚠️ Gemini API not configured, serving deterministic search results")
+    
+    # Matching is case-insensitive, so "usa" and "USA" share one computed result; rate
+    # calculations format the weight as sent, so 2 and 2.0 are kept apart
+    country_upper = country.upper()
+    cache_key = (country_upper, str(weight), data_manager.data_version)
+    with rate_results_cache_lock:
+        cached = rate_results_cache.get(cache_key)
+        if cached is not None:
+            rate_results_cache.move_to_end(cache_key)
+    
+    if cached is None:
         logger.info(f"🔍 Processing request: {country}, {weight}kg")
         
         # Get relevant data and analyze with Gemini
@@ -646,11 +905,11 @@ def get_rates():
         
         if not relevant_data.get('carriers'):
             logger.warning(f"⚠️ No shipping data found for {country}")
-            return jsonify({
+            return {
                 'error': f'No shipping data found for {country}',
                 'country': country,
                 'weight': weight
-            }), 404
+            }, 404
         
         logger.info(f"📊 Found relevant data for {len(relevant_data['carriers'])} carriers")
         
@@ -659,7 +918,7 @@ def get_rates():
         
         if 'error' in gemini_analysis:
             logger.error(f"❌ Gemini analysis error: {gemini_analysis['error']}")
-            return jsonify({'error': f'Analysis error: {gemini_analysis["error"]}'}), 500
+            return {'error': f'Analysis error: {gemini_analysis["error"]}'}, 500
         
         logger.info(f"🤖 Gemini found {gemini_analysis.get('total_carriers_found', 0)} matches")
         
@@ -667,474 +926,197 @@ def get_rates():
         rate_results = RateCalculator.get_actual_rates_from_matches(
             gemini_analysis.get('matches_found', []), 
             weight, 
-            data_manager.master_data
+            data_manager.master_data,
+            data_manager.weight_tiers
         )
         
         # Prepare zone mappings for response
-        zone_mappings = {}
-        for carrier_name in ['fedex', 'dhl', 'ups']:
-            zone_mapping = data_manager.master_data.get('zone_mappings', {}).get(carrier_name, {})
-            country_upper = country.upper()
-            for mapped_country, zone in zone_mapping.items():
-                if country_upper in mapped_country or mapped_country in country_upper:
-                    zone_mappings[f'{carrier_name}_zone'] = zone
-                    break
-        
-        logger.info(f"✅ Returning {len(rate_results)} rate results")
+        zone_mappings = data_manager.zone_mappings_for_country(country_upper)
         
-        # Prepare response
-        response_data = {
-            'country': country,
-            'weight': weight,
-            'data': {
-                'zone_mappings': zone_mappings,
-                'gemini_response': {
-                    'results': rate_results,
-                    'total_found': len(rate_results),
-                    'search_country': country,
-                    'search_weight': weight,
-                    'analysis': gemini_analysis.get('analysis', ''),
-                    'gemini_matches': gemini_analysis.get('total_carriers_found', 0)
-                }
+        cached = (rate_results, zone_mappings, len(gemini_analysis.get('matches_found', [])),
+                  gemini_analysis.get('total_carriers_found', 0))
+        with rate_results_cache_lock:
+            rate_results_cache[cache_key] = cached
+            if len(rate_results_cache) > RATE_RESULTS_CACHE_SIZE:
+                rate_results_cache.popitem(last=False)
+    else:
+        logger.info(f"⚡ Rate cache hit for {country} at {weight}kg")
+    
+    rate_results, zone_mappings, match_count, carriers_found = cached
+    logger.info(f"✅ Returning {len(rate_results)} rate results")
+    
+    # Prepare response
+    response_data = {
+        'country': country,
+        'weight': weight,
+        'data': {
+            'zone_mappings': zone_mappings,
+            'gemini_response': {
+                'results': rate_results,
+                'total_found': len(rate_results),
+                'search_country': country,
+                'search_weight': weight,
+                'analysis': gemini_service.describe_analysis(country, weight, match_count),
+                'gemini_matches': carriers_found
             }
         }
+    }
+    
+    return response_data, 200
+
+@app.route('/api/get-rates', methods=['POST', 'OPTIONS'])
+def get_rates():
+    """Main API endpoint for getting shipping rates"""
+    
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        logger.info("📥 Handling OPTIONS preflight request")
+        response = ojsonify({'status': 'ok'})
+        return response, 200
+    
+    try:
+        logger.info(f"📥 POST request from origin: {request.headers.get('Origin')}")
         
-        return jsonify(response_data), 200
+        # Get and validate request data
+        data = request.get_json()
+        if not data:
+            return ojsonify({'error': 'Invalid JSON data'}), 400
+        
+        response_data, status = build_rate_response(data)
+        return ojsonify(response_data), status
+        
+    except Exception as e:
+        logger.error(f"❌ Server error: {str(e)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("❌ Traceback: %s", traceback.format_exc())
+        return ojsonify({'error': f'Server error: {str(e)}'}), 500
+
+def answer_batch_query(query):
+    """Rate payload for one batch entry, with its HTTP-style status folded in"""
+    if not isinstance(query, dict):
+        return {'status': 400, 'error': 'Each query must be an object'}
+    try:
+        response_data, status = build_rate_response(query)
+    except Exception as e:
+        logger.error(f"❌ Batch query {query} failed: {e}")
+        response_data, status = {'error': f'Server error: {str(e)}'}, 500
+    response_data['status'] = status
+    return response_data
+
+def coalesced_batch_answerer():
+    """answer_batch_query that computes each distinct query in a batch only once"""
+    answers = {}
+    
+    def answer(query):
+        try:
+            key = orjson.dumps(query, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            return answer_batch_query(query)
+        if key not in answers:
+            answers[key] = answer_batch_query(query)
+        # Hand out copies; streamed results are tagged with their own index
+        return dict(answers[key])
+    
+    return answer
+
+@app.route('/api/get-rates-batch', methods=['POST', 'OPTIONS'])
+def get_rates_batch():
+    """Answer several {country, weight} queries in a single round-trip"""
+    
+    # Handle preflight OPTIONS request
+    if request.method == 'OPTIONS':
+        return ojsonify({'status': 'ok'}), 200
+    
+    try:
+        data = request.get_json(silent=True)
+        queries = data.get('queries') if isinstance(data, dict) else data
+        if not isinstance(queries, list) or not queries:
+            return ojsonify({'error': 'Expected a non-empty list of {country, weight} queries'}), 400
+        
+        if len(queries) > MAX_BATCH_QUERIES:
+            return ojsonify({'error': f'At most {MAX_BATCH_QUERIES} queries are allowed per batch'}), 413
+        
+        logger.info(f"📥 Batch request with {len(queries)} queries")
+        
+        # ?stream=1 sends each result as its own NDJSON line as soon as it is ready,
+        # so the client can render the first rates without waiting for the whole batch
+        answer = coalesced_batch_answerer()
+        if request.args.get('stream') == '1':
+            def generate():
+                for index, query in enumerate(queries):
+                    result = answer(query)
+                    result['index'] = index
+                    yield orjson.dumps(result) + b'\n'
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        results = [answer(query) for query in queries]
+        return ojsonify({'results': results, 'total_queries': len(results)}), 200
         
     except Exception as e:
         logger.error(f"❌ Server error: {str(e)}")
-        logger.error(f"❌ Traceback: {traceback.format_exc()}")
-        return jsonify({'error': f'Server error: {str(e)}'}), 500
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("❌ Traceback: %s", traceback.format_exc())
+        return ojsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/carriers', methods=['GET'])
 def get_carriers():
     """Get list of available carriers"""
     if not data_manager.master_data:
-        return jsonify({'error': 'Master data not loaded'}), 500
+        return ojsonify({'error': 'Master data not loaded'}), 500
     
     carriers = list(data_manager.master_data.get('carriers', {}).keys())
-    return jsonify({'carriers': carriers}), 200
+    return ojsonify({'carriers': carriers}), 200
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    status = "healthy" if data_manager.master_data and gemini_service.configured else "unhealthy"
-    return jsonify({
+    status = "healthy" if data_manager.master_data else "unhealthy"
+    return ojsonify({
         'status': status,
         'master_data_loaded': data_manager.master_data is not None,
         'carriers_count': len(data_manager.master_data.get('carriers', {})) if data_manager.master_data else 0,
         'gemini_configured': gemini_service.configured,
         'gemini_api_key_present': bool(gemini_service.api_key),
+        'gemini_valid_keys': len(gemini_service.models),
         'timestamp': time.time()
     }), 200
 
 @app.route('/')
 def index():
     """Serve the frontend"""
-    return '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Majithia International Courier - Professional Rate Finder</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * { box-sizing: border-box; }
-            body { 
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                margin: 0; 
-                padding: 20px; 
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-            }
-            .container { 
-                max-width: 1200px; 
-                margin: 0 auto; 
-                background: white; 
-                padding: 40px; 
-                border-radius: 15px; 
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            }
-            .header {
-                text-align: center;
-                margin-bottom: 40px;
-                border-bottom: 3px solid #007bff;
-                padding-bottom: 20px;
-            }
-            h1 { 
-                color: #2c3e50; 
-                margin: 0; 
-                font-size: 2.5em;
-                font-weight: 700;
-            }
-            .subtitle {
-                color: #7f8c8d;
-                font-size: 1.2em;
-                margin: 10px 0;
-            }
-            .gemini-badge { 
-                background: linear-gradient(45deg, #4285f4, #34a853); 
-                color: white; 
-                padding: 8px 16px; 
-                border-radius: 20px; 
-                font-size: 14px;
-                font-weight: 600;
-                display: inline-block;
-                margin-top: 10px;
-            }
-            .form-section {
-                background: #f8f9fa;
-                padding: 30px;
-                border-radius: 10px;
-                margin-bottom: 30px;
-                border: 2px solid #e9ecef;
-            }
-            .form-group { 
-                margin-bottom: 25px; 
-            }
-            label { 
-                display: block; 
-                margin-bottom: 8px; 
-                font-weight: 600; 
-                color: #495057; 
-                font-size: 16px;
-            }
-            input[type="text"] { 
-                width: 100%; 
-                padding: 15px; 
-                border: 2px solid #dee2e6; 
-                border-radius: 8px; 
-                font-size: 16px;
-                transition: border-color 0.3s;
-            }
-            input[type="text"]:focus {
-                outline: none;
-                border-color: #007bff;
-                box-shadow: 0 0 0 3px rgba(0,123,255,0.25);
-            }
-            .weight-control {
-                display: flex;
-                align-items: center;
-                gap: 15px;
-                justify-content: center;
-                background: white;
-                padding: 15px;
-                border-radius: 10px;
-                border: 2px solid #dee2e6;
-            }
-            .weight-btn {
-                width: 50px;
-                height: 50px;
-                font-size: 24px;
-                font-weight: bold;
-                border: none;
-                border-radius: 50%;
-                cursor: pointer;
-                transition: all 0.3s;
-                color: white;
-            }
-            .weight-btn.decrease {
-                background: linear-gradient(45deg, #dc3545, #c82333);
-            }
-            .weight-btn.increase {
-                background: linear-gradient(45deg, #28a745, #218838);
-            }
-            .weight-btn:hover {
-                transform: scale(1.1);
-                box-shadow: 0 5px 15px rgba(0,0,0,0.3);
-            }
-            .weight-display {
-                font-size: 28px;
-                font-weight: bold;
-                color: #007bff;
-                min-width: 80px;
-                text-align: center;
-                background: #f8f9fa;
-                padding: 10px 20px;
-                border-radius: 8px;
-                border: 2px solid #007bff;
-            }
-            .weight-note {
-                color: #6c757d;
-                font-size: 14px;
-                text-align: center;
-                margin-top: 10px;
-                font-style: italic;
-            }
-            .search-btn { 
-                background: linear-gradient(45deg, #007bff, #0056b3); 
-                color: white; 
-                padding: 18px 50px; 
-                border: none; 
-                border-radius: 10px; 
-                cursor: pointer; 
-                font-size: 18px;
-                font-weight: 600;
-                width: 100%;
-                transition: all 0.3s;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }
-            .search-btn:hover { 
-                background: linear-gradient(45deg, #0056b3, #004085);
-                transform: translateY(-2px);
-                box-shadow: 0 10px 25px rgba(0,123,255,0.4);
-            }
-            .results { margin-top: 40px; }
-            .analysis { 
-                background: linear-gradient(135deg, #e3f2fd, #bbdefb); 
-                border: 2px solid #2196f3; 
-                border-radius: 10px; 
-                padding: 20px; 
-                margin-bottom: 25px;
-                font-size: 16px;
-            }
-            .rate-card { 
-                background: white; 
-                border: 2px solid #e9ecef; 
-                border-radius: 12px; 
-                padding: 25px; 
-                margin-bottom: 20px;
-                transition: all 0.3s;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }
-            .rate-card:hover {
-                transform: translateY(-5px);
-                box-shadow: 0 10px 30px rgba(0,0,0,0.15);
-                border-color: #007bff;
-            }
-            .carrier-name { 
-                font-size: 22px; 
-                font-weight: bold; 
-                color: #007bff; 
-                margin-bottom: 15px;
-                border-bottom: 2px solid #e9ecef;
-                padding-bottom: 10px;
-            }
-            .rate-details { 
-                display: grid; 
-                grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); 
-                gap: 15px; 
-            }
-            .detail-item { 
-                background: #f8f9fa; 
-                padding: 15px; 
-                border-radius: 8px; 
-                border-left: 4px solid #007bff;
-                font-size: 14px;
-            }
-            .detail-item strong {
-                color: #495057;
-                display: block;
-                margin-bottom: 5px;
-            }
-            .error { 
-                color: #dc3545; 
-                background: #f8d7da; 
-                padding: 20px; 
-                border-radius: 8px; 
-                margin-top: 20px;
-                border: 2px solid #dc3545;
-                font-weight: 600;
-            }
-            .loading { 
-                text-align: center; 
-                color: #007bff; 
-                margin-top: 30px;
-                font-size: 18px;
-                font-weight: 600;
-            }
-            .no-results { 
-                text-align: center; 
-                color: #6c757d; 
-                background: #e9ecef; 
-                padding: 30px; 
-                border-radius: 10px; 
-                margin-top: 30px;
-                font-size: 18px;
-            }
-            .results-header {
-                background: linear-gradient(135deg, #28a745, #20c997);
-                color: white;
-                padding: 20px;
-                border-radius: 10px;
-                margin-bottom: 25px;
-                text-align: center;
-            }
-            .results-header h3 {
-                margin: 0;
-                font-size: 24px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🏢 Majithia International Courier</h1>
-                <div class="subtitle">Professional International Shipping Rate Calculator</div>
-                <div class="gemini-badge">Powered by Gemini AI</div>
-            </div>
-            
-            <div class="form-section">
-                <div class="form-group">
-                    <label for="country">🌍 Destination Country:</label>
-                    <input type="text" id="country" placeholder="e.g., Canada, Australia, UAE, Singapore" />
-                </div>
-                
-                <div class="form-group">
-                    <label>📦 Package Weight (kg):</label>
-                    <div class="weight-control">
-                        <button type="button" class="weight-btn decrease" onclick="decreaseWeight()">−</button>
-                        <div class="weight-display" id="weight-display">0.5</div>
-                        <button type="button" class="weight-btn increase" onclick="increaseWeight()">+</button>
-                    </div>
-                    <div class="weight-note">Weight increments: 0.5kg steps only (0.5, 1.0, 1.5, 2.0...)</div>
-                </div>
-                
-                <button class="search-btn" onclick="findRates()">🔍 Find Best Shipping Rates</button>
-            </div>
-            
-            <div id="results" class="results"></div>
-        </div>
+    if INDEX is None:
+        abort(404)
+    return INDEX.response()
 
-        <script>
-            let currentWeight = 0.5;
-            
-            function updateWeightDisplay() {
-                document.getElementById('weight-display').textContent = currentWeight.toFixed(1);
-            }
-            
-            function increaseWeight() {
-                currentWeight += 0.5;
-                updateWeightDisplay();
-            }
-            
-            function decreaseWeight() {
-                if (currentWeight > 0.5) {
-                    currentWeight -= 0.5;
-                    updateWeightDisplay();
-                }
-            }
-            
-            async function findRates() {
-                const country = document.getElementById('country').value.trim();
-                const weight = currentWeight;
-                const resultsDiv = document.getElementById('results');
-                
-                if (!country) {
-                    resultsDiv.innerHTML = '<div class="error">⚠️ Please enter a destination country.</div>';
-                    return;
-                }
-                
-                resultsDiv.innerHTML = '<div class="loading">🏢 Majithia International Courier AI is finding best rates...</div>';
-                
-                try {
-                    const response = await fetch('/api/get-rates', {
-                        method: 'POST',
-                        headers: { 
-                            'Content-Type': 'application/json',
-                            'Accept': 'application/json'
-                        },
-                        body: JSON.stringify({ country, weight })
-                    });
-                    
-                    const data = await response.json();
-                    
-                    if (data.error) {
-                        resultsDiv.innerHTML = `<div class="error">❌ ${data.error}</div>`;
-                        return;
-                    }
-                    
-                    if (data.data && data.data.gemini_response && data.data.gemini_response.results.length > 0) {
-                        const geminiData = data.data.gemini_response;
-                        let html = `
-                            <div class="results-header">
-                                <h3>📦 Found ${geminiData.total_found} shipping options for ${data.country} (${data.weight}kg)</h3>
-                            </div>
-                        `;
-                        
-                        if (geminiData.analysis) {
-                            html += `<div class="analysis"><strong>🤖 AI Analysis:</strong> ${geminiData.analysis}</div>`;
-                        }
-                        
-                        geminiData.results.sort((a, b) => a.final_rate - b.final_rate);
-                        
-                        geminiData.results.forEach((rate, index) => {
-                            const rankBadge = index === 0 ? '🥇 BEST RATE' : index === 1 ? '🥈' : index === 2 ? '🥉' : '';
-                            html += `
-                                <div class="rate-card">
-                                    <div class="carrier-name">${rate.carrier} - ${rate.service_type} ${rankBadge}</div>
-                                    <div class="rate-details">
-                                        <div class="detail-item">
-                                            <strong>💰 Rate:</strong> ${rate.rate}
-                                        </div>
-                                        <div class="detail-item">
-                                            <strong>🧮 Calculation:</strong> ${rate.calculation}
-                                        </div>
-                                        <div class="detail-item">
-                                            <strong>🎯 Match:</strong> ${rate.matched_country}
-                                        </div>
-                                        <div class="detail-item">
-                                            <strong>⚖️ Weight Tier:</strong> ${rate.weight_tier}kg
-                                        </div>
-                                        <div class="detail-item">
-                                            <strong>🔍 Method:</strong> ${rate.match_type.replace('_', ' ')}
-                                        </div>
-                                        ${rate.zone ? `<div class="detail-item"><strong>🌐 Zone:</strong> ${rate.zone}</div>` : ''}
-                                        ${rate.reasoning ? `<div class="detail-item"><strong>💡 Why:</strong> ${rate.reasoning}</div>` : ''}
-                                    </div>
-                                </div>
-                            `;
-                        });
-                        
-                        resultsDiv.innerHTML = html;
-                    } else {
-                        resultsDiv.innerHTML = '<div class="no-results">🏢 No shipping options available for this destination and weight combination.</div>';
-                    }
-                    
-                } catch (error) {
-                    console.error('Network error:', error);
-                    resultsDiv.innerHTML = `<div class="error">❌ Network error: ${error.message}</div>`;
-                }
-            }
-            
-            document.addEventListener('keypress', function(e) {
-                if (e.key === 'Enter') {
-                    findRates();
-                }
-            });
-            
-            updateWeightDisplay();
-        </script>
-    </body>
-    </html>
-    '''
+# Error handlers; their bodies never change, so they are encoded once
+NOT_FOUND_BODY = orjson.dumps({'error': 'Endpoint not found'})
+INTERNAL_ERROR_BODY = orjson.dumps({'error': 'Internal server error'})
 
-# Error handlers
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return Response(NOT_FOUND_BODY, status=404, mimetype='application/json')
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
+    return Response(INTERNAL_ERROR_BODY, status=500, mimetype='application/json')
 
 if __name__ == '__main__':
-    print("🏢 Starting Majithia International Courier Rate Finder...")
-    print("✨ Professional shipping rate calculator with AI intelligence")
+    port = int(os.getenv('PORT', 5000))
+    
+    logger.info("🏢 Starting Majithia International Courier Rate Finder...")
+    logger.info("✨ Professional shipping rate calculator with AI intelligence")
     
     if not gemini_service.api_key:
-        print("⚠️  Warning: GEMINI_API_KEY not found in environment variables")
-        print("   Please add your Gemini API key to .env file")
+        logger.warning("⚠️  Warning: GEMINI_API_KEY not found in environment variables")
+        logger.warning("   Please add your Gemini API key to .env file")
     
     if data_manager.master_data:
-        print("✅ Ready to serve professional rate requests!")
-        print("🌐 Access your app at: http://localhost:5000")
+        logger.info("✅ Ready to serve professional rate requests!")
+        logger.info("🌐 Access your app at: http://localhost:%s", port)
     else:
-        print("❌ Master data not loaded. Starting server anyway for debugging...")
-        print("🌐 Access your app at: http://localhost:5000")
-    
-    # Use different configurations for development vs production
-    debug_mode = os.getenv('FLASK_ENV') == 'development'
-    port = int(os.getenv('PORT', 5000))
+        logger.error("❌ Master data not loaded. Starting server anyway for debugging...")
+        logger.info("🌐 Access your app at: http://localhost:%s", port)
     
+    # Debugger and reloader only when explicitly asked for; production runs under gunicorn
+    debug_mode = os.getenv('FLASK_DEBUG') == '1' or os.getenv('FLASK_ENV') == 'development'
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Gunicorn settings picked up automatically by the Procfile / app.yaml entrypoints"""
+import gc
+import multiprocessing
+import os
+
+# The -b :$PORT flag on the command line wins; this covers a bare `gunicorn app_smart_fixed:app`
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Rate matching is pure in-memory CPU work, so threaded workers are the right default.
+# Set GUNICORN_WORKER_CLASS=gevent (with gevent installed) when serving the Gemini-backed cream.py,
+# where requests spend their time blocked on outbound HTTPS.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Load the app (master JSON + DataManager indexes) once in the master and share it with the
+# workers copy-on-write. cream.py opens gRPC channels to Gemini at import, which must not
+# cross a fork, so run it with GUNICORN_PRELOAD=0.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+# gthread parks idle keep-alive sockets in its poller rather than a thread, so a page's connection
+# can comfortably outlive the pause between loading it and the first rate search
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '30'))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Move the preloaded rate data out of the GC's reach before workers fork"""
+    if preload_app:
+        # Collections in a worker would otherwise write to every tracked object's header,
+        # copying the shared pages into each worker
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Let google-generativeai's gRPC channels cooperate with gevent workers"""
+    if worker_class == 'gevent':
+        # Without this a blocked Gemini call parks the whole worker instead of yielding the greenlet
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
@@ -0,0 +1,245 @@
+let currentWeight = 0.5;
+
+// Parsed responses per country|weight in least-recently-used order, and requests still in flight
+const RATE_CACHE_SIZE = 64;
+const RATE_CACHE_TTL_MS = 300 * 1000;
+const rateCache = new Map();
+const inflight = new Map();
+
+// Title suffixes for the three cheapest results
+const RANK_BADGES = [' - BEST RATE ⭐', ' - 2nd Best', ' - 3rd Best'];
+
+// { key, controller } of the request the page is currently waiting on
+let currentSearch = null;
+
+// Rapid +/- presses only repaint the weight once per frame
+let weightDisplayPending = false;
+
+function updateWeightDisplay() {
+    if (weightDisplayPending) return;
+    weightDisplayPending = true;
+    requestAnimationFrame(() => {
+        document.getElementById('weight-display').textContent = currentWeight.toFixed(1);
+        weightDisplayPending = false;
+    });
+}
+
+function increaseWeight() {
+    currentWeight += 0.5;
+    updateWeightDisplay();
+}
+
+function decreaseWeight() {
+    if (currentWeight > 0.5) {
+        currentWeight -= 0.5;
+        updateWeightDisplay();
+    }
+}
+
+async function requestRates(country, weight, signal) {
+    console.log('Making request with:', { country, weight });
+
+    const response = await fetch('/api/get-rates', {
+        signal,
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json'
+        },
+        body: new URLSearchParams({ country, weight })
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    console.log('Response data:', data);
+    return data;
+}
+
+// Rates for several destinations in one round-trip; each result carries its own status
+async function findRatesBulk(queries) {
+    const response = await fetch('/api/get-rates-bulk', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        },
+        body: JSON.stringify({ queries })
+    });
+
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+    return data.results;
+}
+
+function fetchRates(country, weight) {
+    const key = `${country.toLowerCase()}|${weight}`;
+
+    // A search for another destination or weight makes the previous request's answer useless
+    if (currentSearch && currentSearch.key !== key) {
+        currentSearch.controller.abort();
+        currentSearch = null;
+    }
+
+    const cached = rateCache.get(key);
+    if (cached && Date.now() - cached.storedAt < RATE_CACHE_TTL_MS) {
+        // Re-insert so the Map's insertion order stays least-recently-used first
+        rateCache.delete(key);
+        rateCache.set(key, cached);
+        return Promise.resolve(cached.data);
+    }
+
+    // Repeated clicks or Enter presses while a search is running share its request
+    let pending = inflight.get(key);
+    if (!pending) {
+        const controller = new AbortController();
+        const promise = requestRates(country, weight, controller.signal)
+            .then(data => {
+                if (!data.error) {
+                    rateCache.delete(key);
+                    rateCache.set(key, { data, storedAt: Date.now() });
+                    if (rateCache.size > RATE_CACHE_SIZE) {
+                        rateCache.delete(rateCache.keys().next().value);
+                    }
+                }
+                return data;
+            })
+            .finally(() => inflight.delete(key));
+        pending = { promise, controller };
+        inflight.set(key, pending);
+    }
+    currentSearch = { key, controller: pending.controller };
+    return pending.promise;
+}
+
+function showMessage(resultsDiv, className, text) {
+    const message = document.createElement('div');
+    message.className = className;
+    message.textContent = text;
+    resultsDiv.replaceChildren(message);
+}
+
+function renderRateCard(template, rate, rankBadge) {
+    const card = template.content.firstElementChild.cloneNode(true);
+    const fields = {
+        title: `${rate.carrier} - ${rate.service_type}${rankBadge}`,
+        rate: rate.rate,
+        calculation: rate.calculation,
+        matched_country: rate.matched_country,
+        weight_tier: `${rate.weight_tier}kg`,
+        match_type: rate.match_type.replace('_', ' '),
+        zone: rate.zone,
+        reasoning: rate.reasoning
+    };
+    for (const field of card.querySelectorAll('[data-field]')) {
+        field.textContent = fields[field.dataset.field];
+    }
+    // Zone and details rows only show when the result has them
+    card.querySelector('[data-row="zone"]').hidden = !rate.zone;
+    card.querySelector('[data-row="reasoning"]').hidden = !rate.reasoning;
+    return card;
+}
+
+async function findRates() {
+    const country = document.getElementById('country').value.trim();
+    const weight = currentWeight;
+    const resultsDiv = document.getElementById('results');
+
+    if (!country) {
+        showMessage(resultsDiv, 'error', 'Please enter a destination country.');
+        return;
+    }
+
+    showMessage(resultsDiv, 'loading', 'Smart rate finder is searching for best rates...');
+
+    try {
+        const data = await fetchRates(country, weight);
+
+        if (data.error) {
+            showMessage(resultsDiv, 'error', data.error);
+            return;
+        }
+
+        // Check if we have valid data structure
+        if (!data.data || !data.data.smart_response) {
+            console.error('Invalid response structure:', data);
+            showMessage(resultsDiv, 'error', 'Invalid response from server');
+            return;
+        }
+
+        const smartData = data.data.smart_response;
+
+        if (!smartData.results || smartData.results.length === 0) {
+            showMessage(resultsDiv, 'no-results', 'No shipping options available for this destination and weight combination.');
+            return;
+        }
+
+        // Display results, built off-document and attached in one step
+        const fragment = document.createDocumentFragment();
+
+        const header = document.createElement('div');
+        header.className = 'results-header';
+        const title = document.createElement('h3');
+        title.textContent = `Found ${smartData.total_found} shipping options for ${data.country} (${data.weight}kg)`;
+        header.appendChild(title);
+        fragment.appendChild(header);
+
+        if (smartData.analysis) {
+            const analysis = document.createElement('div');
+            analysis.className = 'analysis';
+            const label = document.createElement('strong');
+            label.textContent = 'Smart Analysis:';
+            analysis.append(label, ` ${smartData.analysis}`);
+            fragment.appendChild(analysis);
+        }
+
+        // The server sends priced results only, already sorted by final_rate (lowest first)
+        const template = document.getElementById('rate-card-tpl');
+        smartData.results.forEach((rate, index) => {
+            const rankBadge = rate.final_rate > 0 ? RANK_BADGES[index] || '' : '';
+            fragment.appendChild(renderRateCard(template, rate, rankBadge));
+        });
+
+        resultsDiv.replaceChildren(fragment);
+
+    } catch (error) {
+        if (error.name === 'AbortError') {
+            // Superseded by a newer search, which owns the results area now
+            return;
+        }
+        console.error('Network error:', error);
+        showMessage(resultsDiv, 'error', `Network error: ${error.message}. Please check the console for more details.`);
+    }
+}
+
+// One listener for every button, keyed by its data-act attribute
+const ACTIONS = { dec: decreaseWeight, inc: increaseWeight, find: findRates };
+
+document.addEventListener('click', function(e) {
+    const target = e.target.closest('[data-act]');
+    if (target) {
+        ACTIONS[target.dataset.act]();
+    }
+});
+
+// Allow Enter key to trigger search
+document.addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') {
+        findRates();
+    }
+});
+
+// Initialize weight display
+updateWeightDisplay();
+
+// Cache the page shell and recent quotes for returning visitors
+if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register('/sw.js');
+}
@@ -0,0 +1,108 @@
+// Served at /sw.js; the server fills in SHELL_VERSION and SHELL_URLS with the current asset hashes
+const SHELL_VERSION = 'dev';
+const SHELL_URLS = ['/'];
+
+const SHELL_CACHE = 'shell-' + SHELL_VERSION;
+const RATES_CACHE = 'rates-v1';
+const RATES_TTL_MS = 300 * 1000;
+const CACHED_AT_HEADER = 'X-SW-Cached-At';
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(SHELL_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    // Shell caches from earlier deploys are dropped; cached rates stay until their TTL runs out
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith('shell-') && key !== SHELL_CACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (event.request.method === 'POST' && url.pathname === '/api/get-rates') {
+        event.respondWith(cachedRates(event));
+    } else if (event.request.method === 'GET' && url.pathname === '/') {
+        event.respondWith(cachedShell(event));
+    } else if (event.request.method === 'GET' && url.pathname.startsWith('/assets/')) {
+        // Hashed asset URLs never change content, so a cached copy is always current
+        event.respondWith(
+            caches.match(event.request).then(cached => cached || fetch(event.request))
+        );
+    }
+});
+
+// Page shell: answer from the cache and refresh it in the background
+async function cachedShell(event) {
+    const cache = await caches.open(SHELL_CACHE);
+    const cached = await cache.match('/');
+    const network = fetch(event.request).then(response => {
+        if (response.ok) cache.put('/', response.clone());
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}
+
+// Cache key for a rate query: SHA-1 of the normalized country and weight
+async function rateKey(request) {
+    // The page posts a form; other clients may send JSON
+    let query;
+    try {
+        const body = request.clone();
+        query = (request.headers.get('Content-Type') || '').startsWith('application/json')
+            ? await body.json()
+            : Object.fromEntries(new URLSearchParams(await body.text()));
+    } catch (e) {
+        return null;
+    }
+    const country = String(query.country || '').trim().toLowerCase();
+    const weight = parseFloat(query.weight);
+    if (!country || isNaN(weight)) return null;
+
+    const digest = await crypto.subtle.digest('SHA-1', new TextEncoder().encode(`${country}|${weight}`));
+    const hash = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+    // The Cache API ignores URL fragments when matching, so the hash goes in the query string
+    return new Request(`/api/get-rates?q=${hash}`);
+}
+
+async function storeRates(cache, key, response) {
+    const headers = new Headers(response.headers);
+    headers.set(CACHED_AT_HEADER, String(Date.now()));
+    const body = await response.blob();
+    await cache.put(key, new Response(body, { status: response.status, headers }));
+}
+
+// Rate quotes: stale-while-revalidate for RATES_TTL_MS, then straight to the network
+async function cachedRates(event) {
+    const key = await rateKey(event.request);
+    if (!key) return fetch(event.request);
+
+    const cache = await caches.open(RATES_CACHE);
+    const cached = await cache.match(key);
+    const network = fetch(event.request.clone()).then(response => {
+        if (response.ok) {
+            event.waitUntil(storeRates(cache, key, response.clone()));
+        }
+        return response;
+    });
+
+    if (cached && Date.now() - Number(cached.headers.get(CACHED_AT_HEADER)) < RATES_TTL_MS) {
+        event.waitUntil(network.catch(() => {}));
+        return cached;
+    }
+    return network;
+}